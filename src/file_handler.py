@@ -6,13 +6,40 @@ File Handler Module
 
 import os
 import hashlib
-import json
 import logging
-from typing import List, Dict, Optional, Tuple
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Set, Tuple
 from pathlib import Path
 from datetime import datetime
 import mimetypes
 
+# 設定ファイルの共有キャッシュ（スクリプトとして直接実行された場合は src がパスの先頭）
+try:
+    from src.utils.config_cache import load_config
+except ImportError:
+    from utils.config_cache import load_config
+
+# BLAKE3はオプション依存（インストールされている場合のみ利用可能）
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# ハッシュ計算時の読み込みサイズ（1 MiB）
+HASH_CHUNK_SIZE = 1 << 20
+
+# これより小さいファイルはスレッドに渡さずその場でハッシュ計算する
+INLINE_HASH_MAX_BYTES = 256 * 1024
+
+# これより大きいファイルはmmapでハッシュ計算する（16 MiB）
+MMAP_HASH_MIN_BYTES = 16 << 20
+
+# 部分ハッシュ（フィンガープリント）で読む先頭・末尾のサイズ（64 KiB）
+FINGERPRINT_BYTES = 64 * 1024
+
+
 class FileHandler:
     """ファイル処理を管理するクラス"""
     
@@ -27,30 +54,40 @@ class FileHandler:
         self.config = self._load_config(config_path)
         
         # 設定値の読み込み
-        self.audio_extensions = self.config.get(
-            "audio_extensions",
-            [".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg"]
+        # 判定はファイル・フォルダごとに行われるためfrozensetでO(1)にする
+        self.audio_extensions = frozenset(
+            ext.lower() for ext in self.config.get(
+                "audio_extensions",
+                [".mp3", ".wav", ".m4a", ".aac", ".flac", ".ogg"]
+            )
         )
         self.max_file_size_mb = self.config.get("max_file_size_mb", 500)
         self.max_file_size_bytes = self.max_file_size_mb * 1024 * 1024
-        self.exclude_folders = self.config.get(
+        self.exclude_folders = frozenset(self.config.get(
             "exclude_folders",
             [".Spotlight-V100", ".Trashes", "System Volume Information", "$RECYCLE.BIN"]
-        )
+        ))
         self.preserve_folder_structure = self.config.get("preserve_folder_structure", True)
+        self.hash_workers = self.config.get(
+            "hash_workers",
+            min(32, (os.cpu_count() or 1) * 4)
+        )
+        # 取り外し可能なメディアでは mmap 中の抜去で SIGBUS になるため、既定では使わない
+        self.hash_use_mmap = self.config.get("hash_use_mmap", False)
         
-        # MIMEタイプの初期化
-        mimetypes.init()
+        # 拡張子→MIMEタイプの対応表を事前に構築（ファイルごとの推測を避ける）
+        self._ext_to_mime = {
+            ext: mimetypes.guess_type(f"x{ext}")[0] or "audio/unknown"
+            for ext in self.audio_extensions
+        }
     
     def _load_config(self, config_path: str) -> Dict:
-        """設定ファイルを読み込む"""
-        config_file = Path(config_path)
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
+        """設定ファイルを読み込む（解析結果は他モジュールと共有）"""
+        config = load_config(config_path)
+        if config is None:
             self.logger.warning(f"Config file not found: {config_path}")
             return {}
+        return config
     
     def scan_audio_files(self, base_path: str) -> List[Dict[str, any]]:
         """
@@ -71,30 +108,73 @@ class FileHandler:
         
         self.logger.info(f"Scanning for audio files in: {base_path}")
         
-        # ファイルを再帰的に検索
-        for root, dirs, files in os.walk(base_path):
-            # 除外フォルダをスキップ
-            dirs[:] = [d for d in dirs if d not in self.exclude_folders]
+        # ファイルを再帰的に検索（DirEntryのstat情報を再利用する）
+        for entry in self._iter_file_entries(str(base_path)):
+            # 拡張子をファイル名の文字列だけで判定し、対象外ならPathもstatも作らない
+            name = entry.name
+            dot = name.rfind('.')
+            if dot <= 0 or name[dot:].lower() not in self.audio_extensions:
+                continue
             
-            for file in files:
-                file_path = Path(root) / file
-                
-                # 音声ファイルかチェック
-                if self.is_audio_file(file_path):
-                    file_info = self.get_file_info(file_path, base_path)
-                    if file_info:
-                        audio_files.append(file_info)
-                        self.logger.debug(f"Found audio file: {file_path}")
+            try:
+                stat_result = entry.stat()
+            except OSError as e:
+                self.logger.error(f"Error checking file: {entry.path} - {e}")
+                continue
+            
+            file_path = Path(entry.path)
+            
+            # 音声ファイルかチェック
+            if self.is_audio_file(file_path, stat_result):
+                file_info = self.get_file_info(file_path, base_path, stat_result)
+                if file_info:
+                    audio_files.append(file_info)
+                    self.logger.debug(f"Found audio file: {file_path}")
         
         self.logger.info(f"Found {len(audio_files)} audio files")
         return audio_files
     
-    def is_audio_file(self, file_path: Path) -> bool:
+    def _iter_file_entries(self, base_path: str):
+        """
+        除外フォルダを飛ばしながらファイルのDirEntryを再帰的に列挙
+        
+        Args:
+            base_path: 走査を開始するディレクトリ
+            
+        Yields:
+            ファイル（ディレクトリ以外）のDirEntry
+        """
+        stack = [base_path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    subdirs = []
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        
+                        if not is_dir:
+                            yield entry
+                        elif entry.name not in self.exclude_folders and not entry.is_symlink():
+                            # 除外フォルダとシンボリックリンクは辿らない（os.walkと同じ）
+                            subdirs.append(entry.path)
+            except OSError as e:
+                self.logger.error(f"Error scanning directory: {current} - {e}")
+                continue
+            
+            # os.walk と同じくトップダウンで走査
+            stack.extend(reversed(subdirs))
+    
+    def is_audio_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> bool:
         """
         ファイルが音声ファイルかどうかを判定
         
         Args:
             file_path: チェックするファイルのパス
+            stat_result: 取得済みのstat情報（省略時はファイルをstatする）
             
         Returns:
             音声ファイルの場合True
@@ -105,7 +185,9 @@ class FileHandler:
         
         # ファイルサイズチェック
         try:
-            file_size = file_path.stat().st_size
+            if stat_result is None:
+                stat_result = file_path.stat()
+            file_size = stat_result.st_size
             if file_size > self.max_file_size_bytes:
                 self.logger.warning(
                     f"File too large ({file_size / 1024 / 1024:.2f}MB): {file_path}"
@@ -123,25 +205,30 @@ class FileHandler:
         
         return True
     
-    def get_file_info(self, file_path: Path, base_path: Path) -> Optional[Dict]:
+    def get_file_info(self, file_path: Path, base_path: Path,
+                      stat_result: Optional[os.stat_result] = None) -> Optional[Dict]:
         """
         ファイルの詳細情報を取得
         
         Args:
             file_path: ファイルのパス
             base_path: ベースパス（相対パス計算用）
+            stat_result: 取得済みのstat情報（省略時はファイルをstatする）
             
         Returns:
             ファイル情報の辞書
         """
         try:
-            stat = file_path.stat()
+            stat = stat_result if stat_result is not None else file_path.stat()
             
             # 相対パスを計算
             relative_path = file_path.relative_to(base_path)
             
-            # MIMEタイプを推測
-            mime_type, _ = mimetypes.guess_type(str(file_path))
+            # MIMEタイプを対応表から取得
+            extension = file_path.suffix.lower()
+            mime_type = self._ext_to_mime.get(extension)
+            if mime_type is None:
+                mime_type = mimetypes.guess_type(str(file_path))[0]
             
             file_info = {
                 "name": file_path.name,
@@ -149,7 +236,7 @@ class FileHandler:
                 "relative_path": str(relative_path),
                 "size": stat.st_size,
                 "size_mb": stat.st_size / 1024 / 1024,
-                "extension": file_path.suffix.lower(),
+                "extension": extension,
                 "mime_type": mime_type or "audio/unknown",
                 "modified_time": datetime.fromtimestamp(stat.st_mtime).isoformat(),
                 "created_time": datetime.fromtimestamp(stat.st_ctime).isoformat(),
@@ -166,29 +253,43 @@ class FileHandler:
         """
         ファイルのハッシュ値を計算
         
+        既定値のMD5はGoogle Driveのmd5Checksumおよび同期履歴DBと
+        比較できるため維持している。
+        
         Args:
             file_path: ファイルのパス
-            algorithm: ハッシュアルゴリズム（md5, sha1, sha256）
+            algorithm: ハッシュアルゴリズム（md5, sha1, sha256 などhashlibが扱える名前、
+                       またはblake3）
             
         Returns:
             ハッシュ値の文字列
         """
-        hash_algorithms = {
-            "md5": hashlib.md5,
-            "sha1": hashlib.sha1,
-            "sha256": hashlib.sha256
-        }
-        
-        if algorithm not in hash_algorithms:
-            raise ValueError(f"Unsupported algorithm: {algorithm}")
-        
-        hasher = hash_algorithms[algorithm]()
+        if algorithm == "blake3" and BLAKE3_AVAILABLE:
+            hasher = blake3.blake3()
+        else:
+            try:
+                hasher = hashlib.new(algorithm)
+            except ValueError:
+                raise ValueError(f"Unsupported algorithm: {algorithm}")
         
         try:
             with open(file_path, 'rb') as f:
-                # チャンクごとに読み込んでハッシュを計算（メモリ効率）
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hasher.update(chunk)
+                # 大きなファイルはページキャッシュを直接ハッシュに渡す（コピー削減）
+                if self.hash_use_mmap and os.fstat(f.fileno()).st_size >= MMAP_HASH_MIN_BYTES:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if hasattr(mm, "madvise"):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)
+                        hasher.update(mm)
+                    return hasher.hexdigest()
+                
+                # 固定バッファに読み込んでハッシュを計算（メモリ効率・システムコール削減）
+                buffer = bytearray(HASH_CHUNK_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    size = f.readinto(buffer)
+                    if not size:
+                        break
+                    hasher.update(view[:size])
             
             return hasher.hexdigest()
             
@@ -221,13 +322,19 @@ class FileHandler:
         
         return str(destination_path)
     
-    def filter_new_files(self, files: List[Dict], existing_hashes: List[str]) -> List[Dict]:
+    def filter_new_files(self, files: List[Dict], existing_hashes: List[str],
+                         existing_fingerprints: Optional[Dict[int, Set[str]]] = None) -> List[Dict]:
         """
         新規ファイルのみをフィルタリング
         
+        existing_fingerprints を渡した場合は、サイズと先頭・末尾の部分ハッシュで
+        既存ファイルと一致し得ないものを全体ハッシュなしで新規と判定する。
+        この場合、新規と判定されたファイルの "hash" は None のまま（後で計算）。
+        
         Args:
             files: ファイル情報のリスト
             existing_hashes: 既存ファイルのハッシュ値リスト
+            existing_fingerprints: 既存ファイルの {サイズ: 部分ハッシュの集合}
             
         Returns:
             新規ファイルのリスト
@@ -235,14 +342,44 @@ class FileHandler:
         new_files = []
         existing_hashes_set = set(existing_hashes)
         
+        # サイズ・部分ハッシュで新規と確定できるファイルを先に除外
+        pending = [f for f in files if not f.get("hash")]
+        known_new = set()
+        if existing_fingerprints is not None:
+            needs_full_hash = []
+            for file_info in pending:
+                if self._may_exist(file_info, existing_fingerprints):
+                    needs_full_hash.append(file_info)
+                else:
+                    known_new.add(id(file_info))
+            pending = needs_full_hash
+        
+        # ハッシュ未計算のファイルを並列で計算（hashlibはGILを解放する）
+        large_files = [f for f in pending if f.get("size", 0) >= INLINE_HASH_MAX_BYTES]
+        small_files = [f for f in pending if f.get("size", 0) < INLINE_HASH_MAX_BYTES]
+        
+        if large_files and self.hash_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+                futures = [
+                    executor.submit(self.calculate_file_hash, file_info["path"])
+                    for file_info in large_files
+                ]
+                for file_info in small_files:
+                    self._assign_hash(file_info)
+                for file_info, future in zip(large_files, futures):
+                    self._assign_hash(file_info, future)
+        else:
+            for file_info in pending:
+                self._assign_hash(file_info)
+        
         for file_info in files:
-            # ハッシュ値を計算
+            if id(file_info) in known_new:
+                new_files.append(file_info)
+                self.logger.info(f"New file detected: {file_info['name']}")
+                continue
+            
             if not file_info.get("hash"):
-                try:
-                    file_info["hash"] = self.calculate_file_hash(file_info["path"])
-                except Exception as e:
-                    self.logger.error(f"Failed to calculate hash: {e}")
-                    continue
+                continue
             
             # 新規ファイルかチェック
             if file_info["hash"] not in existing_hashes_set:
@@ -253,6 +390,52 @@ class FileHandler:
         
         return new_files
     
+    def calculate_fingerprint(self, file_path: str, file_size: int) -> str:
+        """
+        ファイルの先頭と末尾だけを使った部分ハッシュ（フィンガープリント）を計算
+        
+        Args:
+            file_path: ファイルのパス
+            file_size: ファイルサイズ（バイト）
+            
+        Returns:
+            部分ハッシュ値の文字列
+        """
+        hasher = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            hasher.update(f.read(FINGERPRINT_BYTES))
+            if file_size > FINGERPRINT_BYTES * 2:
+                f.seek(-FINGERPRINT_BYTES, os.SEEK_END)
+                hasher.update(f.read(FINGERPRINT_BYTES))
+            elif file_size > FINGERPRINT_BYTES:
+                hasher.update(f.read())
+        return hasher.hexdigest()
+    
+    def _may_exist(self, file_info: Dict, existing_fingerprints: Dict[int, Set[str]]) -> bool:
+        """サイズと部分ハッシュから既存ファイルと一致し得るかを判定"""
+        fingerprints = existing_fingerprints.get(file_info.get("size"))
+        if not fingerprints:
+            return False
+        
+        try:
+            fingerprint = self.calculate_fingerprint(file_info["path"], file_info["size"])
+        except Exception as e:
+            # 判定できない場合は全体ハッシュに任せる
+            self.logger.debug(f"Failed to calculate fingerprint: {e}")
+            return True
+        
+        return fingerprint in fingerprints
+    
+    def _assign_hash(self, file_info: Dict, future=None) -> None:
+        """ハッシュ値を計算（またはFutureから取得）してfile_infoに設定"""
+        try:
+            if future is not None:
+                file_info["hash"] = future.result()
+            else:
+                file_info["hash"] = self.calculate_file_hash(file_info["path"])
+        except Exception as e:
+            self.logger.error(f"Failed to calculate hash: {e}")
+    
     def organize_files_by_type(self, files: List[Dict]) -> Dict[str, List[Dict]]:
         """
         ファイルを拡張子別に整理
@@ -19,23 +19,92 @@ import os
 import json
 import mimetypes
 import hashlib
+import threading
+import time
+import random
+import socket
+import ssl
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Protocol
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import pickle
 
 # Google API クライアントライブラリ
+import httplib2
+import google_auth_httplib2
+from google.auth.exceptions import TransportError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload, MediaInMemoryUpload
 
-# ローカルモジュール
-from utils.logger import Logger
-from utils.database import SyncDatabase
+# ローカルモジュール（スクリプトとして直接実行された場合は src がパスの先頭）
+try:
+    from src.utils.database import SyncDatabase
+except ImportError:
+    from utils.database import SyncDatabase
+
+
+class SyncLogger(Protocol):
+    """GoogleDriveSync が使用するログ出力のインターフェース"""
+    
+    def log_info(self, message: str) -> None: ...
+    
+    def log_success(self, message: str) -> None: ...
+    
+    def log_warning(self, message: str) -> None: ...
+    
+    def log_error(self, message: str) -> None: ...
+
+
+class UploadIntegrityError(Exception):
+    """送信した内容と Drive 側のチェックサムが一致しない場合の例外"""
+
+
+class HashingMediaFileUpload(MediaFileUpload):
+    """
+    送信するバイト列からMD5を計算する MediaFileUpload
+    
+    アップロードのために読み込んだチャンクをそのままハッシュに通すため、
+    送信内容の検証にファイルを再読み込みする必要がない。
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._md5 = hashlib.md5()
+        self._hashed_bytes = 0
+    
+    def has_stream(self):
+        # ストリームを渡すと再開可能アップロードで getbytes が呼ばれずハッシュを計算できないため、
+        # チャンクは常に getbytes で読み込ませる
+        return False
+    
+    def getbytes(self, begin, length):
+        data = super().getbytes(begin, length)
+        end = begin + len(data)
+        
+        # 再送されたチャンクは二重に計算しない
+        if self._md5 is not None and begin <= self._hashed_bytes < end:
+            self._md5.update(data[self._hashed_bytes - begin:])
+            self._hashed_bytes = end
+        elif begin > self._hashed_bytes:
+            # 読み飛ばしがあった場合は全体のハッシュにならない
+            self._md5 = None
+        return data
+    
+    def md5_hexdigest(self) -> Optional[str]:
+        """
+        送信済み内容のMD5を取得
+        
+        Returns:
+            ファイル全体を送信済みの場合はMD5、それ以外はNone
+        """
+        if self._md5 is None or self._hashed_bytes != self.size():
+            return None
+        return self._md5.hexdigest()
 
 
 class GoogleDriveSync:
@@ -54,7 +123,67 @@ class GoogleDriveSync:
         '.ogg': 'audio/ogg'
     }
     
-    def __init__(self, config: Dict, logger: Logger, database: Optional[SyncDatabase] = None):
+    # 拡張子（小文字）→MIMEタイプの対応表（標準の対応表に音声用の定義を上書き）
+    MIME_TYPES = {**mimetypes.types_map, **AUDIO_MIME_TYPES}
+    
+    # files.list の検索クエリ（値は _quote_query_value でエスケープして埋め込む）
+    QUERY_FOLDER_BY_NAME = "name={name} and mimeType='application/vnd.google-apps.folder' and trashed=false"
+    QUERY_FOLDER_IN_PARENT = ("name={name} and {parent} in parents and "
+                              "mimeType='application/vnd.google-apps.folder' and trashed=false")
+    QUERY_FILE_IN_PARENT = "name={name} and {parent} in parents and trashed=false"
+    QUERY_CHILDREN = "{parent} in parents and trashed=false"
+    
+    # アップロードサマリーの書式
+    UPLOAD_SUMMARY_TEMPLATE = "\n".join([
+        "",
+        "====== アップロードサマリー ======",
+        "総ファイル数: %d",
+        "成功: %d",
+        "失敗: %d",
+        "スキップ: %d",
+        "成功率: %.1f%%",
+        "アップロード容量: %.1f / %.1f MB",
+        "================================",
+    ])
+    
+    # ハッシュ計算時の読み込みサイズ（1 MiB）
+    HASH_CHUNK_SIZE = 1 << 20
+    
+    # ハッシュキャッシュの照合に使う部分ハッシュの先頭・末尾のサイズ（64 KiB）
+    FINGERPRINT_BYTES = 64 * 1024
+    
+    # 再開可能アップロードのチャンクサイズの単位（256 KiB）
+    CHUNK_ALIGNMENT = 256 * 1024
+    
+    # バッチリクエスト1回あたりの最大リクエスト数（Drive API の上限）
+    BATCH_LIMIT = 100
+    
+    # 再試行する HTTP ステータス（レート制限とサーバー側の一時的なエラー）
+    RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+    
+    # 403 でもレート制限によるもの（待てば成功する）として再試行する理由
+    RATE_LIMIT_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+    
+    # 再試行する通信エラー（ローカルファイルの OSError などは再試行しない）
+    TRANSIENT_ERRORS = (
+        httplib2.HttpLib2Error,
+        ConnectionError,
+        TimeoutError,
+        socket.timeout,
+        socket.gaierror,
+        ssl.SSLError,
+        TransportError,
+        UploadIntegrityError,
+    )
+    
+    # 再試行の待機時間の上限（秒）
+    MAX_RETRY_DELAY = 64
+    
+    # 解析済みの Drive API ディスカバリードキュメント（プロセス内で共有）
+    _discovery_document = None
+    _discovery_lock = threading.Lock()
+    
+    def __init__(self, config: Dict, logger: SyncLogger, database: Optional[SyncDatabase] = None):
         """
         初期化
         
@@ -66,9 +195,26 @@ class GoogleDriveSync:
         self.config = config
         self.logger = logger
         self.database = database or SyncDatabase(logger=logger)
-        self.service = None
         self.credentials = None
         
+        # httplib2.Http はスレッドセーフではないため、Drive サービスはスレッドごとに保持する
+        self._thread_local = threading.local()
+        self._credentials_lock = threading.Lock()
+        
+        # フォルダIDキャッシュ {(親フォルダID, フォルダ名): フォルダID}
+        self._folder_cache = {}
+        self._folder_cache_lock = threading.Lock()
+        self._folder_create_lock = threading.Lock()
+        
+        # このセッションで作成したフォルダのID（作成直後は空なのでDriveへの重複確認を省略できる）
+        self._session_created_folders = set()
+        
+        # 並列アップロード中のフォルダ内容索引 {フォルダID: {ファイル名: [md5Checksum]}}
+        self._dir_index = None
+        self._dir_index_lock = threading.Lock()
+        # フォルダごとの取得用ロック（一覧の取得中も他のフォルダの確認を待たせない）
+        self._dir_index_folder_locks = {}
+        
         # 現在のセッションID
         self.current_session_id = None
         
@@ -76,12 +222,18 @@ class GoogleDriveSync:
         self.target_folder_id = config.get('gdrive_folder_id', 'root')
         self.parallel_uploads = config.get('parallel_uploads', 5)
         self.retry_attempts = config.get('retry_attempts', 3)
-        self.chunk_size = config.get('upload_chunk_size_mb', 10) * 1024 * 1024
+        self.retry_delay = config.get('retry_delay_seconds', 10)
+        # 再開可能アップロードのチャンクは 256 KiB の倍数である必要があるため切り上げる
+        chunk_size = int(config.get('upload_chunk_size_mb', 32) * 1024 * 1024)
+        self.chunk_size = max(1, -(-chunk_size // self.CHUNK_ALIGNMENT)) * self.CHUNK_ALIGNMENT
+        self.resumable_threshold = config.get('resumable_threshold_mb', 20) * 1024 * 1024
         self.use_database = config.get('use_database', True)
+        self.trust_db_for_dedup = config.get('trust_db_for_dedup', True)
+        self.hash_workers = config.get('hash_workers', min(32, (os.cpu_count() or 1) * 4))
         
         # 認証情報のパス
         self.credentials_path = Path('config/credentials/credentials.json')
-        self.token_path = Path('config/credentials/token.pickle')
+        self.token_path = Path('config/credentials/token.json')
         
         # アップロード統計
         self.upload_stats = {
@@ -92,6 +244,13 @@ class GoogleDriveSync:
             'total_bytes': 0,
             'uploaded_bytes': 0
         }
+        self._stats_lock = threading.Lock()
+        
+        # 並列アップロード中にまとめて記録する同期結果（None の間は都度記録）
+        self._pending_records = None
+        self._synced_keys = set()
+        self._history_checked = set()
+        self._records_lock = threading.Lock()
         
         # 初期化時に認証を実行
         self._authenticate()
@@ -100,9 +259,12 @@ class GoogleDriveSync:
         """Google Drive API の認証を行う"""
         try:
             # トークンファイルが存在する場合は読み込み
+            # （以前の token.pickle は安全でないため読み込まず、再認証で token.json に移行する）
             if self.token_path.exists():
-                with open(self.token_path, 'rb') as token:
-                    self.credentials = pickle.load(token)
+                self.credentials = Credentials.from_authorized_user_file(
+                    str(self.token_path),
+                    self.SCOPES
+                )
                 self.logger.log_info("既存の認証トークンを読み込みました")
             
             # 認証情報が無効または存在しない場合
@@ -128,18 +290,88 @@ class GoogleDriveSync:
                     self.logger.log_info("新規認証が完了しました")
                 
                 # トークンを保存
-                self.token_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(self.token_path, 'wb') as token:
-                    pickle.dump(self.credentials, token)
+                self._save_token()
             
-            # Google Drive サービスを構築
-            self.service = build('drive', 'v3', credentials=self.credentials)
+            # Google Drive サービスを構築（呼び出しスレッド用）
+            self._thread_local.service = self._build_service()
             self.logger.log_success("Google Drive API への接続が確立されました")
             
         except Exception as e:
             self.logger.log_error(f"認証エラー: {e}")
             raise
     
+    def _save_token(self) -> None:
+        """
+        認証トークンを保存
+        
+        一時ファイルに書き込んでから置き換えるため、同時に起動した
+        別プロセスが書きかけのトークンを読み込むことはない。
+        """
+        self.token_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.token_path.with_name(f"{self.token_path.name}.{os.getpid()}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.credentials.to_json())
+            os.replace(temp_path, self.token_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            raise
+    
+    @property
+    def service(self):
+        """
+        呼び出しスレッド専用の Google Drive サービス
+        
+        並列アップロードの各ワーカーが独自のHTTP接続を持つよう、
+        初回アクセス時にスレッドごとに構築する。
+        """
+        if self.credentials is None:
+            return None
+        
+        # 有効期限切れのトークンは1スレッドだけがリフレッシュする
+        if not self.credentials.valid:
+            with self._credentials_lock:
+                if not self.credentials.valid and self.credentials.refresh_token:
+                    self.credentials.refresh(Request())
+                    try:
+                        self._save_token()
+                    except OSError as e:
+                        self.logger.log_warning(f"認証トークンの保存に失敗しました: {e}")
+        
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = self._build_service()
+            self._thread_local.service = service
+        return service
+    
+    def _build_service(self):
+        """専用の HTTP 接続を持つ Google Drive サービスを構築"""
+        http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+        
+        document = self._get_discovery_document()
+        if document is None:
+            return build('drive', 'v3', http=http, cache_discovery=False)
+        return build_from_document(document, http=http)
+    
+    @classmethod
+    def _get_discovery_document(cls) -> Optional[Dict]:
+        """
+        ライブラリ同梱のディスカバリードキュメントを一度だけ読み込んで解析する
+        
+        スレッドごと・インスタンスごとのサービス構築で約200KBのJSONを
+        繰り返し解析しないようにする。
+        
+        Returns:
+            解析済みのディスカバリードキュメント（同梱されていない場合None）
+        """
+        with cls._discovery_lock:
+            if cls._discovery_document is None:
+                content = get_static_doc('drive', 'v3')
+                if content:
+                    cls._discovery_document = json.loads(content)
+            return cls._discovery_document
+    
     def start_sync_session(self, usb_path: str) -> str:
         """
         同期セッションを開始
@@ -150,6 +382,10 @@ class GoogleDriveSync:
         Returns:
             セッションID
         """
+        # 前回のセッションで作成したフォルダの結果はこのセッションの履歴にない
+        with self._folder_cache_lock:
+            self._session_created_folders.clear()
+        
         if self.use_database:
             self.current_session_id = self.database.create_session(usb_path)
             self.logger.log_info(f"Sync session started: {self.current_session_id}")
@@ -187,6 +423,8 @@ class GoogleDriveSync:
             
         self.logger.log_info(f"Sync session ended: {self.current_session_id}")
         self.current_session_id = None
+        with self._folder_cache_lock:
+            self._session_created_folders.clear()
     
     def check_connection(self) -> bool:
         """
@@ -227,27 +465,275 @@ class GoogleDriveSync:
                 self.logger.log_info(f"フォルダは既に存在します: {folder_name}")
                 return existing
             
-            # フォルダメタデータ
-            file_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder',
-                'parents': [parent_id]
-            }
-            
-            # フォルダ作成
-            folder = self.service.files().create(
-                body=file_metadata,
-                fields='id'
-            ).execute()
-            
-            folder_id = folder.get('id')
-            self.logger.log_success(f"フォルダを作成しました: {folder_name} (ID: {folder_id})")
-            return folder_id
+            return self._create_new_folder(folder_name, parent_id)
             
         except Exception as e:
             self.logger.log_error(f"フォルダ作成エラー: {e}")
             raise
     
+    def _create_new_folder(self, folder_name: str, parent_id: str) -> str:
+        """
+        既存チェックを行わずにフォルダを作成
+        
+        Args:
+            folder_name: フォルダ名
+            parent_id: 親フォルダのID
+        
+        Returns:
+            作成したフォルダのID
+        """
+        # フォルダメタデータ
+        file_metadata = {
+            'name': folder_name,
+            'mimeType': 'application/vnd.google-apps.folder',
+            'parents': [parent_id]
+        }
+        
+        # フォルダ作成
+        folder = self.service.files().create(
+            body=file_metadata,
+            fields='id'
+        ).execute()
+        
+        folder_id = folder.get('id')
+        self.logger.log_success(f"フォルダを作成しました: {folder_name} (ID: {folder_id})")
+        self._cache_folder(parent_id, folder_name, folder_id)
+        with self._folder_cache_lock:
+            self._session_created_folders.add(folder_id)
+        return folder_id
+    
+    def _resolve_path_ids(self, path_parts: List[str], root_id: str) -> str:
+        """
+        フォルダパスを解決し、末端フォルダのIDを返す（存在しない階層は作成）
+        
+        各階層の検索を Drive のバッチリクエストにまとめ、
+        階層ごとのラウンドトリップを1回に削減する。
+        
+        Args:
+            path_parts: 起点フォルダからのフォルダ名のリスト
+            root_id: 起点フォルダのID
+        
+        Returns:
+            末端フォルダのID
+        """
+        if not path_parts:
+            return root_id
+        
+        # 解決済みの階層はキャッシュからたどる
+        current_id, resolved = self._walk_folder_cache(path_parts, root_id)
+        if resolved == len(path_parts):
+            return current_id
+        remaining = path_parts[resolved:]
+        
+        # 残りの各階層の同名フォルダ候補をバッチで取得し、親子関係をたどって既存の階層を確定
+        candidates = self._batch_find_folders(remaining)
+        current_id, found = self._walk_folder_candidates(remaining, current_id, candidates)
+        resolved += found
+        
+        if resolved == len(path_parts):
+            return current_id
+        
+        # 残りの階層を作成（並列アップロード中に同じフォルダを重複作成しないよう直列化）
+        with self._folder_create_lock:
+            current_id, resolved = self._walk_folder_cache(path_parts, root_id)
+            
+            # バッチ検索で取りこぼした可能性があるため、実際に作成するまでは各階層を既存チェックする
+            created = False
+            for folder_name in path_parts[resolved:]:
+                existing = None if created else self._find_folder(folder_name, current_id)
+                if existing:
+                    current_id = existing
+                else:
+                    # 作成したフォルダは空なので、以降の階層は検索しない
+                    current_id = self._create_new_folder(folder_name, current_id)
+                    created = True
+        
+        return current_id
+    
+    def _batch_find_folders(self, folder_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        同名フォルダの候補をバッチリクエストでまとめて検索
+        
+        Args:
+            folder_names: 検索するフォルダ名のリスト
+        
+        Returns:
+            {フォルダ名: [{'id': ..., 'parents': [...]}]}
+        """
+        names = list(dict.fromkeys(folder_names))
+        candidates = {}
+        next_page_tokens = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                # 取得できなかった名前は候補なしとなり、作成時に個別に既存チェックされる
+                self.logger.log_error(f"フォルダ検索エラー: {exception}")
+                return
+            index = int(request_id)
+            candidates.setdefault(names[index], []).extend(response.get('files', []))
+            if response.get('nextPageToken'):
+                next_page_tokens[index] = response['nextPageToken']
+        
+        # 同名フォルダは日付フォルダごとに存在し得るため、全ページを取得する
+        page_tokens = dict.fromkeys(range(len(names)))
+        while page_tokens:
+            indexes = list(page_tokens)
+            for start in range(0, len(indexes), self.BATCH_LIMIT):
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for index in indexes[start:start + self.BATCH_LIMIT]:
+                    query = self.QUERY_FOLDER_BY_NAME.format(
+                        name=self._quote_query_value(names[index])
+                    )
+                    batch.add(
+                        self.service.files().list(
+                            q=query,
+                            spaces='drive',
+                            fields='nextPageToken, files(id, parents)',
+                            pageSize=1000,
+                            pageToken=page_tokens[index]
+                        ),
+                        request_id=str(index)
+                    )
+                batch.execute()
+            
+            page_tokens = dict(next_page_tokens)
+            next_page_tokens.clear()
+        
+        return candidates
+    
+    def _walk_folder_candidates(self, path_parts: List[str], root_id: str,
+                                candidates: Dict[str, List[Dict]]) -> Tuple[str, int]:
+        """
+        検索済みの候補で親子関係をたどり、見つかった階層をキャッシュに登録
+        
+        Args:
+            path_parts: 起点フォルダからのフォルダ名のリスト
+            root_id: 起点フォルダのID
+            candidates: _batch_find_folders の結果
+        
+        Returns:
+            (たどり着いたフォルダのID, 解決できた階層数)
+        """
+        current_id = root_id
+        resolved = 0
+        for folder_name in path_parts:
+            folder_id = next(
+                (f['id'] for f in candidates.get(folder_name, []) if current_id in f.get('parents', [])),
+                None
+            )
+            if folder_id is None:
+                break
+            self._cache_folder(current_id, folder_name, folder_id)
+            current_id = folder_id
+            resolved += 1
+        return current_id, resolved
+    
+    def _prefetch_folder_ids(self, folder_paths: List[Tuple[str, ...]], root_id: str) -> None:
+        """
+        複数ファイルのフォルダ階層を事前に解決してキャッシュする
+        
+        全パスの未解決のフォルダ名をまとめてバッチ検索するため、
+        アップロード開始後のファイルごとの問い合わせが不要になる。
+        存在しないフォルダはここでは作成せず、アップロード時に作成する。
+        
+        Args:
+            folder_paths: 起点フォルダからのフォルダ名のタプルのリスト
+            root_id: 起点フォルダのID
+        """
+        pending = []
+        for parts in set(folder_paths):
+            current_id, resolved = self._walk_folder_cache(list(parts), root_id)
+            if resolved < len(parts):
+                pending.append((parts, current_id, resolved))
+        
+        if not pending:
+            return
+        
+        candidates = self._batch_find_folders(
+            [name for parts, _, resolved in pending for name in parts[resolved:]]
+        )
+        for parts, current_id, resolved in pending:
+            self._walk_folder_candidates(list(parts[resolved:]), current_id, candidates)
+    
+    def _materialize_folder_tree(self, file_paths: List[str], root_id: str) -> Dict[str, str]:
+        """
+        ファイルの親ディレクトリごとにDrive上のフォルダを確定（存在しない階層は作成）
+        
+        Args:
+            file_paths: アップロードするファイルパスのリスト
+            root_id: 起点フォルダのID
+        
+        Returns:
+            {ローカルのディレクトリパス: フォルダID}（解決に失敗したディレクトリは含まない）
+        """
+        folder_paths = {}
+        for file_path in file_paths:
+            directory = Path(file_path).parent
+            if str(directory) not in folder_paths:
+                folder_paths[str(directory)] = self._relative_folders(directory) if directory.name else ()
+        
+        # 既存のフォルダをまとめてバッチ検索
+        try:
+            self._prefetch_folder_ids(list(folder_paths.values()), root_id)
+        except Exception as e:
+            self.logger.log_warning(f"フォルダの事前解決に失敗しました: {e}")
+        
+        # 浅い階層から順に解決し、不足分を作成
+        folder_ids = {}
+        for directory, parts in sorted(folder_paths.items(), key=lambda item: len(item[1])):
+            try:
+                folder_ids[directory] = self._resolve_path_ids(list(parts), root_id)
+            except Exception as e:
+                # 解決できなかったディレクトリはアップロード時に再試行する
+                self.logger.log_warning(f"フォルダの作成に失敗しました ({directory}): {e}")
+        
+        return folder_ids
+    
+    def _walk_folder_cache(self, path_parts: List[str], root_id: str) -> Tuple[str, int]:
+        """
+        フォルダIDキャッシュでパスをたどれるところまでたどる
+        
+        Args:
+            path_parts: 起点フォルダからのフォルダ名のリスト
+            root_id: 起点フォルダのID
+        
+        Returns:
+            (たどり着いたフォルダのID, 解決できた階層数)
+        """
+        current_id = root_id
+        resolved = 0
+        with self._folder_cache_lock:
+            for folder_name in path_parts:
+                folder_id = self._folder_cache.get((current_id, folder_name))
+                if folder_id is None:
+                    break
+                current_id = folder_id
+                resolved += 1
+        return current_id, resolved
+    
+    def _cache_folder(self, parent_id: str, folder_name: str, folder_id: str) -> None:
+        """フォルダIDをキャッシュに登録"""
+        with self._folder_cache_lock:
+            self._folder_cache[(parent_id, folder_name)] = folder_id
+    
+    def clear_folder_cache(self) -> None:
+        """フォルダIDキャッシュを破棄（Drive側でフォルダが削除された場合など）"""
+        with self._folder_cache_lock:
+            self._folder_cache.clear()
+    
+    @staticmethod
+    def _quote_query_value(value: str) -> str:
+        """
+        files.list の検索クエリ用に文字列をクォート
+        
+        Args:
+            value: 埋め込む文字列（ファイル名・フォルダ名・ID）
+        
+        Returns:
+            バックスラッシュとシングルクォートをエスケープした 'value' 形式の文字列
+        """
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+    
     def _find_folder(self, folder_name: str, parent_id: str) -> Optional[str]:
         """
         指定された名前のフォルダを検索
@@ -259,8 +745,16 @@ class GoogleDriveSync:
         Returns:
             フォルダが見つかった場合そのID、見つからない場合None
         """
+        with self._folder_cache_lock:
+            cached = self._folder_cache.get((parent_id, folder_name))
+        if cached:
+            return cached
+        
         try:
-            query = f"name='{folder_name}' and '{parent_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            query = self.QUERY_FOLDER_IN_PARENT.format(
+                name=self._quote_query_value(folder_name),
+                parent=self._quote_query_value(parent_id)
+            )
             response = self.service.files().list(
                 q=query,
                 spaces='drive',
@@ -269,6 +763,7 @@ class GoogleDriveSync:
             
             files = response.get('files', [])
             if files:
+                self._cache_folder(parent_id, folder_name, files[0]['id'])
                 return files[0]['id']
             return None
             
@@ -293,14 +788,33 @@ class GoogleDriveSync:
         
         # データベースで確認（有効な場合）
         if self.use_database and file_hash:
-            db_record = self.database.check_file_exists(file_hash, parent_id)
-            if db_record:
+            # 一括確認済みの組み合わせは個別に問い合わせない
+            key = (file_hash, parent_id)
+            with self._records_lock:
+                known = key in self._synced_keys
+                checked = key in self._history_checked
+            if known or (not checked and self.database.check_file_exists(file_hash, parent_id)):
                 self.logger.log_info(f"ファイルは履歴に存在します: {file_name}")
                 return True
         
+        # このセッションで作成したフォルダには履歴にないファイルは存在しない
+        if self._is_session_folder(parent_id):
+            return False
+        
+        # 一括取得済みのフォルダ内容で確認（並列アップロード中のみ）
+        dir_index = self._get_dir_index(parent_id)
+        if dir_index is not None:
+            checksums = dir_index.get(file_name)
+            if checksums is None:
+                return False
+            return file_hash in checksums if file_hash else True
+        
         # Google Drive API で確認
         try:
-            query = f"name='{file_name}' and '{parent_id}' in parents and trashed=false"
+            query = self.QUERY_FILE_IN_PARENT.format(
+                name=self._quote_query_value(file_name),
+                parent=self._quote_query_value(parent_id)
+            )
             response = self.service.files().list(
                 q=query,
                 spaces='drive',
@@ -325,8 +839,90 @@ class GoogleDriveSync:
             self.logger.log_error(f"ファイル存在確認エラー: {e}")
             return False
     
+    def _is_session_folder(self, folder_id: str) -> bool:
+        """
+        データベースの履歴だけで重複確認できるフォルダか判定
+        
+        このセッションで作成したフォルダは、アップロードの成否がすべて
+        データベースに記録されるため Drive への問い合わせが不要。
+        セッションが開始されていない間は結果が記録されないため使用しない。
+        
+        Args:
+            folder_id: フォルダのID
+        
+        Returns:
+            このセッションで作成したフォルダで、履歴を信頼する設定の場合True
+        """
+        if not (self.use_database and self.trust_db_for_dedup and self.current_session_id):
+            return False
+        with self._folder_cache_lock:
+            return folder_id in self._session_created_folders
+    
+    def _get_dir_index(self, parent_id: str) -> Optional[Dict[str, List[str]]]:
+        """
+        フォルダ内のファイル名→md5Checksum の索引を取得
+        
+        並列アップロード中（索引が有効な間）のみ使用し、フォルダごとに
+        ページング付きの files.list を1度だけ実行して結果を保持する。
+        一覧の取得は全体のロックの外で行い、同じフォルダの取得だけを直列化する。
+        
+        Args:
+            parent_id: フォルダのID
+        
+        Returns:
+            {ファイル名: [md5Checksum, ...]}、索引が無効または取得失敗時はNone
+        """
+        with self._dir_index_lock:
+            if self._dir_index is None:
+                return None
+            if parent_id in self._dir_index:
+                return self._dir_index[parent_id]
+            folder_lock = self._dir_index_folder_locks.setdefault(parent_id, threading.Lock())
+        
+        with folder_lock:
+            # 待っている間に別のスレッドが取得済みの場合はそれを使う
+            with self._dir_index_lock:
+                if self._dir_index is None:
+                    return None
+                if parent_id in self._dir_index:
+                    return self._dir_index[parent_id]
+            
+            index = {}
+            try:
+                page_token = None
+                while True:
+                    response = self.service.files().list(
+                        q=self.QUERY_CHILDREN.format(parent=self._quote_query_value(parent_id)),
+                        spaces='drive',
+                        fields='nextPageToken, files(name, md5Checksum)',
+                        pageSize=1000,
+                        pageToken=page_token
+                    ).execute()
+                    for file in response.get('files', []):
+                        index.setdefault(file['name'], []).append(file.get('md5Checksum'))
+                    page_token = response.get('nextPageToken')
+                    if not page_token:
+                        break
+            except Exception as e:
+                self.logger.log_error(f"フォルダ内容の取得エラー: {e}")
+                return None
+            
+            with self._dir_index_lock:
+                if self._dir_index is None:
+                    return None
+                self._dir_index[parent_id] = index
+            return index
+    
+    def _add_to_dir_index(self, parent_id: str, file_name: str, md5_checksum: Optional[str]) -> None:
+        """アップロードしたファイルを索引に反映"""
+        with self._dir_index_lock:
+            if self._dir_index is not None and parent_id in self._dir_index:
+                self._dir_index[parent_id].setdefault(file_name, []).append(md5_checksum)
+    
     def upload_file(self, local_path: str, parent_id: str = None, 
-                   preserve_path: bool = True, file_hash: str = None) -> Optional[str]:
+                   preserve_path: bool = True, file_hash: str = None,
+                   file_size: Optional[int] = None,
+                   root_id: Optional[str] = None) -> Optional[str]:
         """
         ファイルをGoogle Driveにアップロード（データベース記録付き）
         
@@ -335,6 +931,9 @@ class GoogleDriveSync:
             parent_id: 親フォルダのID
             preserve_path: ディレクトリ構造を保持するか
             file_hash: ファイルのハッシュ値
+            file_size: 取得済みのファイルサイズ（省略時はstatする）
+            root_id: parent_id が解決済みのフォルダの場合の起点フォルダID
+                     （404時はここからディレクトリ構造を再解決する）
         
         Returns:
             アップロードしたファイルのID、失敗時はNone
@@ -348,105 +947,207 @@ class GoogleDriveSync:
         if not file_hash:
             file_hash = self._calculate_file_hash(local_path)
         
-        try:
-            # ファイルサイズチェック
-            file_size = local_path.stat().st_size
-            max_size = self.config.get('max_file_size_mb', 500) * 1024 * 1024
-            
-            if file_size > max_size:
-                self.logger.log_warning(f"ファイルサイズが上限を超えています: {local_path.name}")
-                self._record_sync_result(local_path, None, parent_id, file_hash, 'failed', 
-                                        "File size exceeds limit")
-                return None
-            
-            # MIMEタイプの判定
-            mime_type = self.AUDIO_MIME_TYPES.get(
-                local_path.suffix.lower(),
-                mimetypes.guess_type(str(local_path))[0] or 'application/octet-stream'
-            )
-            
-            # ディレクトリ構造の処理
-            upload_parent_id = parent_id
-            if preserve_path and local_path.parent.name:
-                # 親ディレクトリ構造を再現
-                folders = []
-                current = local_path.parent
-                while current.name and current.name not in ['/', 'Volumes']:
-                    folders.append(current.name)
-                    current = current.parent
+        # 失敗時は上限回数まで再試行（再帰せずにループで制御する）
+        attempts = max(1, self.retry_attempts)
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._upload_file_once(local_path, parent_id, preserve_path,
+                                              file_hash, file_size)
+            except Exception as e:
+                self.logger.log_error(f"アップロードエラー ({local_path.name}): {e}")
                 
-                # フォルダを逆順で作成
-                for folder_name in reversed(folders):
-                    upload_parent_id = self.create_folder(folder_name, upload_parent_id)
-            
-            # 重複チェック
-            if self.check_file_exists(local_path.name, upload_parent_id, file_hash):
-                self.logger.log_info(f"ファイルは既に存在します（スキップ）: {local_path.name}")
-                self.upload_stats['skipped_files'] += 1
-                self._record_sync_result(local_path, None, upload_parent_id, file_hash, 'skipped', 
-                                        "File already exists")
-                return None
-            
-            # ファイルメタデータ
-            file_metadata = {
-                'name': local_path.name,
-                'parents': [upload_parent_id]
-            }
-            
-            # メディアアップロード（チャンク分割対応）
-            media = MediaFileUpload(
-                str(local_path),
-                mimetype=mime_type,
-                resumable=True,
-                chunksize=self.chunk_size
-            )
-            
-            # アップロード実行
-            self.logger.log_info(f"アップロード開始: {local_path.name} ({file_size / 1024 / 1024:.1f} MB)")
-            
-            request = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, md5Checksum'
-            )
-            
-            # プログレス表示付きアップロード
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    progress = int(status.progress() * 100)
-                    if progress % 20 == 0:  # 20%ごとに進捗表示
-                        self.logger.log_info(f"  {local_path.name}: {progress}% 完了")
-            
-            file_id = response.get('id')
-            self.logger.log_success(f"アップロード完了: {local_path.name} (ID: {file_id})")
-            
-            # 統計更新
-            self.upload_stats['uploaded_files'] += 1
-            self.upload_stats['uploaded_bytes'] += file_size
-            
-            # データベースに記録
-            self._record_sync_result(local_path, file_id, upload_parent_id, file_hash, 'success')
-            
-            return file_id
-            
-        except Exception as e:
-            self.logger.log_error(f"アップロードエラー ({local_path.name}): {e}")
-            self.upload_stats['failed_files'] += 1
-            
-            # データベースにエラーを記録
-            self._record_sync_result(local_path, None, parent_id, file_hash, 'failed', str(e))
-            
-            # リトライロジック
-            for attempt in range(1, self.retry_attempts):
-                try:
-                    self.logger.log_info(f"リトライ {attempt}/{self.retry_attempts}: {local_path.name}")
-                    return self.upload_file(str(local_path), parent_id, preserve_path, file_hash)
-                except:
+                status = e.resp.status if isinstance(e, HttpError) else None
+                if status == 404:
+                    # キャッシュ済みのフォルダが削除されている可能性があるため再解決させる
+                    self.clear_folder_cache()
+                    if not preserve_path and root_id is not None:
+                        # 解決済みのフォルダIDは使わず、起点フォルダからたどり直す
+                        parent_id, preserve_path = root_id, True
+                
+                # フォルダを再解決できない場合、404 は再試行しても成功しない
+                retryable = self._is_retryable_error(e) and (status != 404 or preserve_path)
+                if retryable and attempt < attempts:
+                    delay = self._retry_delay(e, attempt)
+                    self.logger.log_info(f"リトライ {attempt}/{attempts - 1}: {local_path.name} "
+                                         f"({delay:.1f}秒後)")
+                    time.sleep(delay)
                     continue
-            
+                
+                # 再試行しない（または最終試行で失敗した）場合のみ失敗として記録
+                self._increment_stats(failed_files=1)
+                self._record_sync_result(local_path, None, parent_id, file_hash, 'failed', str(e))
+                return None
+        
+        return None
+    
+    def _is_retryable_error(self, error: Exception) -> bool:
+        """
+        再試行で成功する見込みのあるエラーか判定
+        
+        Args:
+            error: 発生した例外
+        
+        Returns:
+            通信エラー、送信内容の不一致、404（フォルダの再解決）、レート制限、
+            サーバー側の一時的なエラーの場合True
+        """
+        if not isinstance(error, HttpError):
+            return isinstance(error, self.TRANSIENT_ERRORS)
+        
+        status = error.resp.status
+        if status == 404 or status in self.RETRYABLE_STATUS:
+            return True
+        
+        if status == 403:
+            details = getattr(error, 'error_details', None)
+            if isinstance(details, list):
+                return any(
+                    isinstance(detail, dict) and detail.get('reason') in self.RATE_LIMIT_REASONS
+                    for detail in details
+                )
+        
+        return False
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        再試行までの待機時間を計算（指数バックオフ + ジッター）
+        
+        サーバーが Retry-After ヘッダーを返した場合はその値を優先する。
+        
+        Args:
+            error: 発生した例外
+            attempt: 失敗した試行の番号（1始まり）
+        
+        Returns:
+            待機秒数
+        """
+        if isinstance(error, HttpError):
+            retry_after = error.resp.get('retry-after')
+            if retry_after and retry_after.isdigit():
+                return min(self.MAX_RETRY_DELAY, int(retry_after))
+        
+        return min(self.MAX_RETRY_DELAY, self.retry_delay * (2 ** (attempt - 1)) + random.random())
+    
+    def _upload_file_once(self, local_path: Path, parent_id: str,
+                          preserve_path: bool, file_hash: str,
+                          file_size: Optional[int] = None) -> Optional[str]:
+        """
+        ファイルを1回だけアップロード（失敗時は例外を送出）
+        
+        Args:
+            local_path: ローカルファイルパス
+            parent_id: 親フォルダのID
+            preserve_path: ディレクトリ構造を保持するか
+            file_hash: ファイルのハッシュ値
+            file_size: 取得済みのファイルサイズ（省略時はstatする）
+        
+        Returns:
+            アップロードしたファイルのID、スキップ時はNone
+        """
+        # ファイルサイズチェック
+        if file_size is None:
+            file_size = local_path.stat().st_size
+        max_size = self.config.get('max_file_size_mb', 500) * 1024 * 1024
+        
+        if file_size > max_size:
+            self.logger.log_warning(f"ファイルサイズが上限を超えています: {local_path.name}")
+            self._record_sync_result(local_path, None, parent_id, file_hash, 'failed', 
+                                    "File size exceeds limit")
+            return None
+        
+        # MIMEタイプの判定
+        mime_type = self.MIME_TYPES.get(
+            os.path.splitext(local_path.name)[1].lower(),
+            'application/octet-stream'
+        )
+        
+        # ディレクトリ構造の処理
+        upload_parent_id = parent_id
+        if preserve_path and local_path.parent.name:
+            # 親ディレクトリ構造を再現（不足分のみ作成）
+            folders = self._relative_folders(local_path.parent)
+            upload_parent_id = self._resolve_path_ids(list(folders), upload_parent_id)
+        
+        # 重複チェック
+        if self.check_file_exists(local_path.name, upload_parent_id, file_hash):
+            self.logger.log_info(f"ファイルは既に存在します（スキップ）: {local_path.name}")
+            self._increment_stats(skipped_files=1)
+            self._record_sync_result(local_path, None, upload_parent_id, file_hash, 'skipped', 
+                                    "File already exists")
             return None
+        
+        # ファイルメタデータ
+        file_metadata = {
+            'name': local_path.name,
+            'parents': [upload_parent_id]
+        }
+        
+        # メディアアップロード（送信内容のMD5を同時に計算）
+        # 小さなファイルはチャンクごとの往復がないマルチパート送信、大きなファイルのみ再開可能アップロード
+        use_resumable = file_size > self.resumable_threshold
+        media = HashingMediaFileUpload(
+            str(local_path),
+            mimetype=mime_type,
+            resumable=use_resumable,
+            chunksize=self.chunk_size
+        )
+        
+        # アップロード実行
+        self.logger.log_info(f"アップロード開始: {local_path.name} ({file_size / 1024 / 1024:.1f} MB)")
+        
+        request = self.service.files().create(
+            body=file_metadata,
+            media_body=media,
+            fields='id, md5Checksum'
+        )
+        
+        # プログレス表示付きアップロード
+        response = None
+        if not use_resumable:
+            response = request.execute()
+        last_reported = 0
+        while response is None:
+            status, response = request.next_chunk()
+            if status:
+                # 20%の区切りをまたいだときだけ進捗表示（同じ区切りを繰り返し出さない）
+                step = int(status.progress() * 5)
+                if step > last_reported:
+                    last_reported = step
+                    self.logger.log_info(f"  {local_path.name}: {step * 20}% 完了")
+        
+        file_id = response.get('id')
+        
+        # 送信内容とDrive側のチェックサムを照合（再読み込みなし）
+        uploaded_hash = media.md5_hexdigest()
+        remote_hash = response.get('md5Checksum')
+        if uploaded_hash and remote_hash and uploaded_hash != remote_hash:
+            # 壊れたファイルを残さないよう削除してから、再試行・失敗処理に任せる
+            try:
+                self.service.files().delete(fileId=file_id).execute()
+            except Exception as e:
+                self.logger.log_warning(f"不一致ファイルの削除に失敗しました: {local_path.name}: {e}")
+            raise UploadIntegrityError(f"チェックサム不一致: {local_path.name} "
+                                       f"(送信: {uploaded_hash}, Drive: {remote_hash})")
+        if uploaded_hash and uploaded_hash != file_hash:
+            # ハッシュ計算後にファイルが変更された場合は実際に送信した内容を記録
+            self.logger.log_warning(f"アップロード中にファイルが変更されました: {local_path.name}")
+            file_hash = uploaded_hash
+        self.logger.log_success(f"アップロード完了: {local_path.name} (ID: {file_id})")
+        self._add_to_dir_index(upload_parent_id, local_path.name, remote_hash)
+        
+        # 統計更新
+        self._increment_stats(uploaded_files=1, uploaded_bytes=file_size)
+        
+        # データベースに記録
+        self._record_sync_result(local_path, file_id, upload_parent_id, file_hash, 'success')
+        
+        return file_id
+    
+    def _increment_stats(self, **deltas: int) -> None:
+        """アップロード統計を加算（並列アップロードのワーカーから呼ばれる）"""
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self.upload_stats[key] += value
     
     def _record_sync_result(self, local_path: Path, file_id: Optional[str], 
                            folder_id: str, file_hash: str, status: str, 
@@ -455,35 +1156,183 @@ class GoogleDriveSync:
         if not self.use_database or not self.current_session_id:
             return
         
+        # サイズと更新時刻は1回のstatで取得（存在しない場合は既定値）
+        try:
+            stat_result = local_path.stat()
+            file_size = stat_result.st_size
+            last_modified = datetime.fromtimestamp(stat_result.st_mtime)
+        except OSError:
+            file_size = 0
+            last_modified = None
+        
         file_info = {
             'file_path': str(local_path),
             'file_name': local_path.name,
-            'file_size': local_path.stat().st_size if local_path.exists() else 0,
+            'file_size': file_size,
             'file_hash': file_hash,
             'gdrive_file_id': file_id,
             'gdrive_folder_id': folder_id,
             'sync_status': status,
             'error_message': error,
-            'last_modified': datetime.fromtimestamp(local_path.stat().st_mtime) if local_path.exists() else None
+            'last_modified': last_modified
         }
         
+        with self._records_lock:
+            if self._pending_records is not None:
+                self._pending_records.append(file_info)
+                if status == 'success':
+                    self._synced_keys.add((file_hash, folder_id))
+                return
+        
         self.database.record_file_sync(self.current_session_id, file_info)
     
+    def _flush_sync_results(self) -> None:
+        """まとめて記録中の同期結果をデータベースに書き込み、都度記録に戻す"""
+        with self._records_lock:
+            records = self._pending_records
+            self._pending_records = None
+            self._synced_keys = set()
+            self._history_checked = set()
+        
+        if records and self.current_session_id:
+            self.database.record_file_syncs(self.current_session_id, records)
+    
+    @staticmethod
+    def _relative_folders(directory: Path) -> Tuple[str, ...]:
+        """
+        Drive上に再現するフォルダ名を取得（ルートと最後の Volumes までを除く）
+        
+        Args:
+            directory: ローカルのディレクトリパス
+        
+        Returns:
+            フォルダ名のタプル
+        """
+        folders = directory.parts
+        if directory.anchor:
+            folders = folders[1:]
+        if 'Volumes' in folders:
+            folders = folders[len(folders) - folders[::-1].index('Volumes'):]
+        return folders
+    
     def _calculate_file_hash(self, file_path: Path) -> str:
         """ファイルのハッシュ値を計算"""
-        hash_md5 = hashlib.md5()
+        # Driveの md5Checksum と照合するため MD5 のまま計算する
         with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
+            # 先頭から順に読むことをカーネルに伝え、先読みを大きくする（対応OSのみ）
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+            
+            # Python 3.11以降はC実装のループでバッファ読み込みとハッシュ更新を行う
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'md5').hexdigest()
+            
+            hash_md5 = hashlib.md5()
+            # 再利用するバッファに読み込み、チャンクごとのbytes生成を避ける
+            buffer = bytearray(self.HASH_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                size = f.readinto(buffer)
+                if not size:
+                    break
+                hash_md5.update(view[:size])
         return hash_md5.hexdigest()
     
-    def upload_files_parallel(self, file_paths: List[str], parent_id: str = None) -> Dict[str, str]:
+    def _calculate_fingerprint(self, file_path: str, file_size: int) -> str:
+        """ファイルの先頭と末尾だけを使った部分ハッシュを計算（ハッシュキャッシュの照合用）"""
+        hasher = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            hasher.update(f.read(self.FINGERPRINT_BYTES))
+            if file_size > self.FINGERPRINT_BYTES * 2:
+                f.seek(-self.FINGERPRINT_BYTES, os.SEEK_END)
+            hasher.update(f.read(self.FINGERPRINT_BYTES))
+        return hasher.hexdigest()
+    
+    def get_file_hashes(self, file_paths: List[str],
+                        precomputed_hashes: Optional[Dict[str, str]] = None,
+                        file_stats: Optional[Dict[str, os.stat_result]] = None) -> Dict[str, str]:
+        """
+        ファイルのMD5を取得（データベースのハッシュキャッシュを利用）
+        
+        サイズ・更新時刻・inode・先頭と末尾の部分ハッシュがキャッシュと一致する
+        ファイルは全体を読み込まない。残りはスレッドで並列に計算する
+        （hashlibはGILを解放するためプロセスは不要）。
+        
+        Args:
+            file_paths: ファイルパスのリスト
+            precomputed_hashes: 計算済みの {ファイルパス: MD5}（キャッシュにない場合に使う）
+            file_stats: 取得済みの {ファイルパス: stat結果}（省略時はstatする）
+        
+        Returns:
+            {ファイルパス: MD5}（読み込めなかったファイルは含まない）
+        """
+        precomputed_hashes = precomputed_hashes or {}
+        stats = dict(file_stats or {})
+        for file_path in file_paths:
+            if file_path not in stats:
+                try:
+                    stats[file_path] = os.stat(file_path)
+                except OSError:
+                    continue
+        paths = [p for p in file_paths if p in stats]
+        
+        def fingerprint(path):
+            try:
+                return self._calculate_fingerprint(path, stats[path].st_size)
+            except OSError as e:
+                self.logger.log_warning(f"ファイルを読み込めません: {path}: {e}")
+                return None
+        
+        def full_hash(path):
+            try:
+                return self._calculate_file_hash(Path(path))
+            except OSError as e:
+                self.logger.log_warning(f"ファイルを読み込めません: {path}: {e}")
+                return None
+        
+        keys = {}
+        hashes = {}
+        new_hashes = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.hash_workers)) as executor:
+            if self.use_database:
+                for path, value in zip(paths, executor.map(fingerprint, paths)):
+                    if value is not None:
+                        stat_result = stats[path]
+                        keys[path] = (stat_result.st_size, stat_result.st_mtime, stat_result.st_ino, value)
+                paths = [p for p in paths if p in keys]
+                hashes = self.database.get_cached_hashes(keys)
+            
+            new_hashes = {
+                p: precomputed_hashes[p] for p in paths
+                if p not in hashes and p in precomputed_hashes
+            }
+            paths_to_hash = [p for p in paths if p not in hashes and p not in new_hashes]
+            for path, value in zip(paths_to_hash, executor.map(full_hash, paths_to_hash)):
+                if value is not None:
+                    new_hashes[path] = value
+        
+        if new_hashes and self.use_database:
+            self.database.save_cached_hashes([
+                (p, *keys[p], h) for p, h in new_hashes.items()
+            ])
+        
+        hashes.update(new_hashes)
+        return hashes
+    
+    def upload_files_parallel(self, file_paths: List[str], parent_id: str = None,
+                              file_sizes: Optional[Dict[str, int]] = None,
+                              precomputed_hashes: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         複数ファイルを並列でアップロード（差分同期対応）
         
         Args:
             file_paths: アップロードするファイルパスのリスト
             parent_id: 親フォルダのID
+            file_sizes: スキャン時に取得済みの {ファイルパス: サイズ}（省略時はstatする）
+            precomputed_hashes: 呼び出し元で計算済みの {ファイルパス: MD5}（該当ファイルは再計算しない）
         
         Returns:
             {ファイルパス: ファイルID}の辞書
@@ -492,31 +1341,50 @@ class GoogleDriveSync:
             parent_id = self.target_folder_id
         
         results = {}
+        file_hashes = dict(precomputed_hashes or {})
+        
+        # ファイルサイズを1ファイル1回だけ取得（存在しないファイルは含まれない）
+        # 差分同期時はハッシュキャッシュ照合用に更新時刻なども必要なため常にstatする
+        sizes = {}
+        stats = {}
+        for file_path in file_paths:
+            if file_sizes and file_path in file_sizes and not self.use_database:
+                sizes[file_path] = file_sizes[file_path]
+                continue
+            try:
+                stats[file_path] = os.stat(file_path)
+            except OSError:
+                continue
+            sizes[file_path] = stats[file_path].st_size
         
         # 差分同期: 同期が必要なファイルのみ選択
         if self.use_database:
-            # ファイル情報を準備
-            file_infos = []
-            for file_path in file_paths:
-                path = Path(file_path)
-                if path.exists():
-                    file_hash = self._calculate_file_hash(path)
-                    file_infos.append({
-                        'path': file_path,
-                        'hash': file_hash,
-                        'name': path.name,
-                        'size': path.stat().st_size
-                    })
+            # 前回と同じファイルはキャッシュ済みのハッシュを使う（読み込めないファイルは除外）
+            known_hashes = self.get_file_hashes(
+                [p for p in file_paths if p in stats], file_hashes, stats
+            )
+            existing_paths = [p for p in file_paths if p in known_hashes]
+            
+            file_infos = [
+                {
+                    'path': file_path,
+                    'hash': known_hashes[file_path],
+                    'name': os.path.basename(file_path),
+                    'size': sizes[file_path]
+                }
+                for file_path in existing_paths
+            ]
             
             # データベースで差分チェック
             files_to_sync = self.database.get_files_to_sync("", file_infos)
             file_paths = [f['path'] for f in files_to_sync]
+            file_hashes = {f['path']: f['hash'] for f in files_to_sync}
             
             self.logger.log_info(f"差分同期: {len(file_paths)} / {len(file_infos)} ファイルが同期対象")
         
         # 統計リセット
         self.upload_stats['total_files'] = len(file_paths)
-        self.upload_stats['total_bytes'] = sum(Path(p).stat().st_size for p in file_paths if Path(p).exists())
+        self.upload_stats['total_bytes'] = sum(sizes.get(p, 0) for p in file_paths)
         
         if not file_paths:
             self.logger.log_info("同期するファイルがありません")
@@ -524,22 +1392,59 @@ class GoogleDriveSync:
         
         self.logger.log_info(f"並列アップロード開始: {len(file_paths)} ファイル")
         
-        with ThreadPoolExecutor(max_workers=self.parallel_uploads) as executor:
-            # ジョブを投入
-            future_to_path = {
-                executor.submit(self.upload_file, path, parent_id): path
-                for path in file_paths
-            }
-            
-            # 完了を待機
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
-                try:
-                    file_id = future.result()
-                    if file_id:
-                        results[path] = file_id
-                except Exception as e:
-                    self.logger.log_error(f"並列アップロードエラー ({path}): {e}")
+        # ディレクトリごとのアップロード先フォルダを事前に確定（ワーカーごとのフォルダ解決を省略）
+        folder_ids = self._materialize_folder_tree(file_paths, parent_id)
+        
+        # 重複チェック用にフォルダ内容の索引を有効化（ファイルごとの問い合わせを削減）
+        with self._dir_index_lock:
+            self._dir_index = {}
+            self._dir_index_folder_locks = {}
+        self._get_dir_index(parent_id)
+        
+        # 同期履歴での重複確認をまとめて実行（ファイルごとのDB問い合わせを削減）
+        checked = set()
+        synced = set()
+        if self.use_database:
+            for path in file_paths:
+                folder_id = folder_ids.get(str(Path(path).parent))
+                if folder_id and file_hashes.get(path):
+                    checked.add((file_hashes[path], folder_id))
+            synced = self.database.check_files_exist_bulk(list(checked))
+        
+        # 同期結果は終了後に1トランザクションでまとめて記録
+        with self._records_lock:
+            self._pending_records = []
+            self._synced_keys = synced
+            self._history_checked = checked
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.parallel_uploads) as executor:
+                # ジョブを投入
+                future_to_path = {}
+                for path in file_paths:
+                    folder_id = folder_ids.get(str(Path(path).parent))
+                    future = executor.submit(
+                        self.upload_file, path, folder_id or parent_id,
+                        preserve_path=folder_id is None,
+                        file_hash=file_hashes.get(path), file_size=sizes.get(path),
+                        root_id=parent_id
+                    )
+                    future_to_path[future] = path
+                
+                # 完了を待機
+                for future in as_completed(future_to_path):
+                    path = future_to_path[future]
+                    try:
+                        file_id = future.result()
+                        if file_id:
+                            results[path] = file_id
+                    except Exception as e:
+                        self.logger.log_error(f"並列アップロードエラー ({path}): {e}")
+        finally:
+            with self._dir_index_lock:
+                self._dir_index = None
+                self._dir_index_folder_locks = {}
+            self._flush_sync_results()
         
         # 統計表示
         self._print_upload_summary()
@@ -548,22 +1453,22 @@ class GoogleDriveSync:
     
     def _print_upload_summary(self) -> None:
         """アップロード統計サマリーを表示"""
-        stats = self.upload_stats
+        with self._stats_lock:
+            stats = dict(self.upload_stats)
         total = stats['total_files']
         success_rate = (stats['uploaded_files'] / total * 100) if total > 0 else 0
         uploaded_mb = stats['uploaded_bytes'] / 1024 / 1024
         total_mb = stats['total_bytes'] / 1024 / 1024
         
-        summary = f"""
-        ====== アップロードサマリー ======
-        総ファイル数: {total}
-        成功: {stats['uploaded_files']}
-        失敗: {stats['failed_files']}
-        スキップ: {stats['skipped_files']}
-        成功率: {success_rate:.1f}%
-        アップロード容量: {uploaded_mb:.1f} / {total_mb:.1f} MB
-        ================================
-        """
+        summary = self.UPLOAD_SUMMARY_TEMPLATE % (
+            total,
+            stats['uploaded_files'],
+            stats['failed_files'],
+            stats['skipped_files'],
+            success_rate,
+            uploaded_mb,
+            total_mb
+        )
         
         self.logger.log_success(summary)
     
@@ -575,25 +1480,13 @@ class GoogleDriveSync:
             本日の同期フォルダID
         """
         try:
-            # 年フォルダを作成
-            year_folder = self.create_folder(
-                f"{datetime.now().year}年",
+            # 年/月/日付フォルダをまとめて解決（不足分のみ作成）
+            now = datetime.now()
+            date_folder = self._resolve_path_ids(
+                [f"{now.year}年", f"{now.month:02d}月", f"sync_{now.strftime('%Y%m%d')}"],
                 self.target_folder_id
             )
             
-            # 月フォルダを作成
-            month_folder = self.create_folder(
-                f"{datetime.now().month:02d}月",
-                year_folder
-            )
-            
-            # 日付フォルダを作成
-            date_str = datetime.now().strftime("%Y%m%d")
-            date_folder = self.create_folder(
-                f"sync_{date_str}",
-                month_folder
-            )
-            
             return date_folder
             
         except Exception as e:
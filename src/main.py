@@ -9,6 +9,8 @@ import sys
 import time
 import signal
 import json
+import subprocess
+import threading
 from pathlib import Path
 from typing import Optional
 import argparse
@@ -21,6 +23,7 @@ from src.usb_monitor import USBMonitor
 from src.file_handler import FileHandler
 from src.gdrive_sync import GoogleDriveSync
 from src.utils.logger import LogManager, SyncStats
+from src.utils.config_cache import load_config
 
 
 class AudioSyncSystem:
@@ -59,11 +62,16 @@ class AudioSyncSystem:
         # 統計情報
         self.stats = None
         
-        # シャットダウンフラグ
-        self.shutdown = False
+        # シャットダウン要求（待機中のメインスレッドを即座に起こす）
+        self.shutdown_event = threading.Event()
         
         self.logger.info("Audio Sync System initialized")
     
+    @property
+    def shutdown(self) -> bool:
+        """シャットダウン要求の有無（互換用、shutdown_event を参照する）"""
+        return self.shutdown_event.is_set()
+    
     def _load_config(self, config_path: str) -> dict:
         """設定ファイルを読み込む"""
         config_file = Path(config_path)
@@ -71,9 +79,9 @@ class AudioSyncSystem:
             self.logger.error(f"Config file not found: {config_path}")
             self.logger.info("Creating default config file...")
             self._create_default_config(config_path)
-            
-        with open(config_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        
+        # 解析結果は各モジュールと共有される
+        return load_config(config_path)
     
     def _create_default_config(self, config_path: str):
         """デフォルトの設定ファイルを作成"""
@@ -86,9 +94,12 @@ class AudioSyncSystem:
             ],
             "max_file_size_mb": 500,
             "parallel_uploads": 5,
-            "upload_chunk_size_mb": 10,
+            "upload_chunk_size_mb": 32,
+            "resumable_threshold_mb": 20,
             "retry_attempts": 3,
             "retry_delay_seconds": 10,
+            "hash_workers": min(32, (os.cpu_count() or 1) * 4),
+            "hash_use_mmap": False,
             "log_level": "INFO",
             "exclude_folders": [
                 ".Spotlight-V100",
@@ -98,6 +109,7 @@ class AudioSyncSystem:
             ],
             "preserve_folder_structure": True,
             "skip_duplicates": True,
+            "trust_db_for_dedup": True,
             "notification_enabled": True
         }
         
@@ -150,10 +162,17 @@ class AudioSyncSystem:
             
             # アップロード用のファイルパスリストを作成
             files_to_upload = []
+            file_hashes = {}
+            
+            # 重複チェック用のハッシュを先にまとめて取得
+            # （前回から変更のないファイルはハッシュキャッシュを使い、残りは並列に計算する）
+            skip_duplicates = self.config.get('skip_duplicates', True)
+            if skip_duplicates:
+                file_hashes = self.gdrive_sync.get_file_hashes([f['path'] for f in audio_files])
             
             # 各ファイルを処理
             for i, audio_file in enumerate(audio_files, 1):
-                if self.shutdown:
+                if self.shutdown_event.is_set():
                     self.logger.info("Sync interrupted by user")
                     break
                 
@@ -164,11 +183,13 @@ class AudioSyncSystem:
                 self.logger.info(f"Processing ({i}/{len(audio_files)}): {file_name}")
                 
                 # ファイルの重複チェック
-                if self.config.get('skip_duplicates', True):
-                    file_hash = self.file_handler.calculate_hash(file_path)
+                if skip_duplicates:
+                    file_hash = file_hashes.get(file_path)
+                    if file_hash is None:
+                        self.logger.warning(f"Could not hash {file_name}")
                     
                     # Google Drive上の重複チェック
-                    if self.gdrive_sync.check_file_exists(file_name, sync_folder_id):
+                    if self.gdrive_sync.check_file_exists(file_name, sync_folder_id, file_hash):
                         self.logger.info(f"Skipped (already exists): {file_name}")
                         self.stats.add_skip(file_name, "Already exists")
                         self.log_manager.log_sync_progress(
@@ -184,12 +205,17 @@ class AudioSyncSystem:
                 self.logger.info(f"Starting parallel upload of {len(files_to_upload)} files...")
                 
                 # アップロード実行
-                results = self.gdrive_sync.upload_files_parallel(files_to_upload, sync_folder_id)
+                # スキャン時に取得したサイズを渡し、再度statしないようにする
+                file_sizes = {f['path']: f['size'] for f in audio_files}
+                results = self.gdrive_sync.upload_files_parallel(
+                    files_to_upload, sync_folder_id, file_sizes=file_sizes,
+                    precomputed_hashes=file_hashes
+                )
                 
                 # 結果を処理
                 for file_path, file_id in results.items():
                     file_name = os.path.basename(file_path)
-                    file_size = os.path.getsize(file_path)
+                    file_size = file_sizes[file_path]
                     
                     if file_id:
                         self.stats.add_success(file_name, file_size)
@@ -266,10 +292,19 @@ class AudioSyncSystem:
                       f"Failed: {self.stats.failed_count}, "
                       f"Skipped: {self.stats.skipped_count}")
             
-            # macOS通知コマンド
-            os.system(f"""
-                osascript -e 'display notification "{message}" with title "{title}"'
-            """)
+            # macOS通知コマンド（完了を待たず、文字列は引数として渡してシェルを介さない）
+            subprocess.Popen(
+                [
+                    'osascript',
+                    '-e', 'on run argv',
+                    '-e', 'display notification (item 1 of argv) with title (item 2 of argv)',
+                    '-e', 'end run',
+                    message, title
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
             
         except Exception as e:
             self.logger.warning(f"Could not send notification: {e}")
@@ -331,8 +366,8 @@ class AudioSyncSystem:
             self.logger.info("Press Ctrl+C to stop")
         
         try:
-            while not self.shutdown:
-                time.sleep(1)
+            # 停止要求まで待機（定期的に起床しない）
+            self.shutdown_event.wait()
         except KeyboardInterrupt:
             pass
         finally:
@@ -341,7 +376,7 @@ class AudioSyncSystem:
     def stop(self):
         """システムを停止"""
         self.logger.info("Stopping Audio Sync System...")
-        self.shutdown = True
+        self.shutdown_event.set()
         self.usb_monitor.stop_monitoring()
         
         # 古いログをクリーンアップ
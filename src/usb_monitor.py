@@ -5,15 +5,22 @@ USBメモリの接続・切断を監視し、特定のUSBメモリを検出す
 """
 
 import os
+import re
+import sys
 import time
+import select
 import subprocess
-import json
 import logging
 from typing import Dict, List, Optional, Callable
-from pathlib import Path
 import plistlib
 import threading
 
+# 設定ファイルの共有キャッシュ（スクリプトとして直接実行された場合は src がパスの先頭）
+try:
+    from src.utils.config_cache import load_config
+except ImportError:
+    from utils.config_cache import load_config
+
 # macOS固有のインポート
 try:
     from Foundation import NSObject, NSNotificationCenter, NSWorkspace
@@ -26,6 +33,24 @@ except ImportError:
 class USBMonitor:
     """USBメモリの監視と検出を行うクラス"""
     
+    # フォールバック監視の確認間隔（秒）
+    POLL_INTERVAL = 2
+    
+    # マウントテーブル（Linuxでは変更時に poll で通知される）
+    MOUNTS_FILE = '/proc/self/mounts'
+    
+    # マウントポイントの詳細（Linux、外部コマンドなしでボリュームを列挙できる）
+    MOUNTINFO_FILE = '/proc/self/mountinfo'
+    
+    # mountinfo でエスケープされる文字（空白など）の8進表記
+    MOUNTINFO_ESCAPE = re.compile(r'\\([0-7]{3})')
+    
+    # .volumeID の最大サイズ（これより大きいファイルは識別子として扱わない）
+    VOLUME_ID_MAX_SIZE = 4096
+    
+    # macOSのボリュームのマウント先
+    VOLUMES_DIR = '/Volumes'
+    
     def __init__(self, config_path: str = "config/settings.json"):
         """
         初期化
@@ -47,14 +72,12 @@ class USBMonitor:
             self.observer.monitor = self
     
     def _load_config(self, config_path: str) -> Dict:
-        """設定ファイルを読み込む"""
-        config_file = Path(config_path)
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
+        """設定ファイルを読み込む（解析結果は他モジュールと共有）"""
+        config = load_config(config_path)
+        if config is None:
             self.logger.warning(f"Config file not found: {config_path}")
             return {}
+        return config
     
     def get_mounted_volumes(self) -> List[Dict[str, str]]:
         """
@@ -63,6 +86,10 @@ class USBMonitor:
         Returns:
             ボリューム情報のリスト
         """
+        # Linuxではマウントテーブルを直接読む
+        if sys.platform.startswith('linux') and os.path.exists(self.MOUNTINFO_FILE):
+            return self._read_mountinfo()
+        
         volumes = []
         
         try:
@@ -99,6 +126,50 @@ class USBMonitor:
         
         return volumes
     
+    def _read_mountinfo(self) -> List[Dict[str, str]]:
+        """
+        /proc/self/mountinfo からブロックデバイスのボリュームを取得
+        
+        Returns:
+            ボリューム情報のリスト（get_mounted_volumes と同じ形式）
+        """
+        volumes = []
+        
+        try:
+            with open(self.MOUNTINFO_FILE, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    # 形式: ID 親ID メジャー:マイナー ルート マウントポイント オプション ... - 種類 デバイス オプション
+                    fields, _, fs_fields = line.partition(' - ')
+                    fields = fields.split()
+                    fs_fields = fs_fields.split()
+                    if len(fields) < 5 or len(fs_fields) < 2:
+                        continue
+                    
+                    device = fs_fields[1]
+                    if not device.startswith('/dev/'):
+                        # proc や tmpfs などの仮想ファイルシステムは対象外
+                        continue
+                    
+                    mount_point = self.MOUNTINFO_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), fields[4])
+                    volume_name = os.path.basename(mount_point)
+                    if not volume_name:
+                        continue
+                    
+                    volume_info = {
+                        'name': volume_name,
+                        'path': mount_point,
+                        'device': device,
+                        'size': 0,
+                        'type': fs_fields[0]
+                    }
+                    volumes.append(volume_info)
+                    self.logger.debug(f"Found volume: {volume_info}")
+            
+        except OSError as e:
+            self.logger.error(f"Error reading mount table: {e}")
+        
+        return volumes
+    
     def is_target_usb(self, volume_path: str) -> bool:
         """
         指定されたボリュームが監視対象のUSBメモリかどうかを判定
@@ -118,19 +189,43 @@ class USBMonitor:
                 return True
             
             # .volumeIDファイルで判定（カスタム識別子）
-            volume_id_file = os.path.join(volume_path, '.volumeID')
-            if os.path.exists(volume_id_file):
-                with open(volume_id_file, 'r') as f:
-                    volume_id = f.read().strip()
-                    if volume_id == self.usb_identifier:
-                        self.logger.info(f"Target USB detected by ID: {volume_name}")
-                        return True
+            volume_id = self._read_volume_id(volume_path)
+            if volume_id == self.usb_identifier:
+                self.logger.info(f"Target USB detected by ID: {volume_name}")
+                return True
             
         except Exception as e:
             self.logger.error(f"Error checking USB: {e}")
         
         return False
     
+    def _read_volume_id(self, volume_path: str) -> Optional[str]:
+        """
+        ボリュームの .volumeID ファイルから識別子を読み込む
+        
+        Args:
+            volume_path: ボリュームのパス
+        
+        Returns:
+            識別子、ファイルがないか読めない場合（上限より大きい場合を含む）None
+        """
+        try:
+            fd = os.open(os.path.join(volume_path, '.volumeID'), os.O_RDONLY)
+        except OSError:
+            return None
+        
+        try:
+            # 上限を1バイト超えて読み、切り詰めた識別子で比較しないようにする
+            data = os.read(fd, self.VOLUME_ID_MAX_SIZE + 1)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        
+        if len(data) > self.VOLUME_ID_MAX_SIZE:
+            return None
+        return data.decode('utf-8', errors='ignore').strip()
+    
     def on_mount(self, mount_callback: Callable[[str], None]):
         """
         USBマウント時のコールバックを設定
@@ -199,35 +294,80 @@ class USBMonitor:
         )
     
     def _start_fallback_monitoring(self):
-        """フォールバック監視方法（ポーリング）"""
+        """フォールバック監視方法（Linuxではマウントテーブルの変更通知、それ以外はポーリング）"""
         def monitor_loop():
             known_volumes = set()
+            mount_watcher = self._open_mount_watcher()
             
             # 初期状態を取得
             for volume in self.get_mounted_volumes():
                 known_volumes.add(volume['path'])
             
-            while self.is_monitoring:
-                current_volumes = set()
-                
-                for volume in self.get_mounted_volumes():
-                    current_volumes.add(volume['path'])
+            try:
+                while self.is_monitoring:
+                    # マウント状態が変わるまで待機
+                    if not self._wait_for_mount_change(mount_watcher):
+                        continue
                     
-                    # 新しくマウントされたボリューム
-                    if volume['path'] not in known_volumes:
-                        self._handle_mount(volume['path'])
-                
-                # アンマウントされたボリューム
-                for path in known_volumes - current_volumes:
-                    self._handle_unmount(path)
-                
-                known_volumes = current_volumes
-                time.sleep(2)  # 2秒ごとにチェック
+                    current_volumes = set()
+                    
+                    for volume in self.get_mounted_volumes():
+                        current_volumes.add(volume['path'])
+                        
+                        # 新しくマウントされたボリューム
+                        if volume['path'] not in known_volumes:
+                            self._handle_mount(volume['path'])
+                    
+                    # アンマウントされたボリューム
+                    for path in known_volumes - current_volumes:
+                        self._handle_unmount(path)
+                    
+                    known_volumes = current_volumes
+            finally:
+                if mount_watcher:
+                    mount_watcher[1].close()
         
         self.monitor_thread = threading.Thread(target=monitor_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
     
+    def _open_mount_watcher(self):
+        """
+        マウントテーブルの変更通知を受け取る準備（Linuxのみ）
+        
+        Returns:
+            (pollオブジェクト, マウントテーブルのファイル)、利用できない場合None
+        """
+        if not sys.platform.startswith('linux') or not hasattr(select, 'poll'):
+            return None
+        
+        try:
+            mounts = open(self.MOUNTS_FILE, 'rb')
+        except OSError:
+            return None
+        
+        poller = select.poll()
+        poller.register(mounts, select.POLLPRI | select.POLLERR)
+        return poller, mounts
+    
+    def _wait_for_mount_change(self, mount_watcher) -> bool:
+        """
+        マウント状態が変わるまで待機
+        
+        Args:
+            mount_watcher: _open_mount_watcher の戻り値
+            
+        Returns:
+            ボリュームを確認し直す必要がある場合True
+        """
+        if mount_watcher is None:
+            time.sleep(self.POLL_INTERVAL)
+            return True
+        
+        # 監視停止を確認できるようタイムアウト付きで待つ（変更がなければ確認を省略）
+        poller, _ = mount_watcher
+        return bool(poller.poll(self.POLL_INTERVAL * 1000))
+    
     def stop_monitoring(self):
         """USBの監視を停止"""
         if not self.is_monitoring:
@@ -252,6 +392,16 @@ class USBMonitor:
         Returns:
             対象USBのパス、なければNone
         """
+        # macOSではマウント先を直接列挙する（外部コマンドを起動しない）
+        try:
+            with os.scandir(self.VOLUMES_DIR) as it:
+                for entry in it:
+                    if entry.is_dir() and self.is_target_usb(entry.path):
+                        return entry.path
+            return None
+        except OSError:
+            pass
+        
         volumes = self.get_mounted_volumes()
         
         for volume in volumes:
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+設定ファイル読み込みモジュール
+
+各モジュールが同じ settings.json を読み込むため、
+解析結果をプロセス内で共有して再読み込みと再解析を省きます。
+"""
+
+import copy
+import json
+import functools
+from pathlib import Path
+from typing import Dict, Optional
+
+# orjsonはオプション依存（インストールされていれば設定の読み込みに使う）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime: float) -> Dict:
+    """
+    設定ファイルを読み込んでキャッシュする
+
+    (パス, 更新時刻) をキーにするため、ファイルが更新されれば再読み込みされる
+    """
+    return _json_loads(Path(config_path).read_bytes())
+
+
+def load_config(config_path: str) -> Optional[Dict]:
+    """
+    設定ファイルを読み込む
+    
+    Args:
+        config_path: 設定ファイルのパス
+    
+    Returns:
+        設定の辞書（呼び出し側ごとに独立したコピー）、ファイルがない場合None
+    """
+    config_file = Path(config_path)
+    try:
+        mtime = config_file.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    
+    # 呼び出し元の間で共有されるため、入れ子のリストも含めてコピーを返す
+    return copy.deepcopy(_load_config_cached(str(config_file.resolve()), mtime))
@@ -22,14 +22,11 @@ from typing import Optional, List, Dict, Tuple
 from contextlib import contextmanager
 import logging
 
-# ローカルモジュール
-from utils.logger import Logger
-
 
 class SyncDatabase:
     """同期履歴データベースクラス"""
     
-    def __init__(self, db_path: str = "config/sync_history.db", logger: Optional[Logger] = None):
+    def __init__(self, db_path: str = "config/sync_history.db", logger: Optional[logging.Logger] = None):
         """
         初期化
         
@@ -55,6 +52,9 @@ class SyncDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            # WALモード（並列アップロード中の読み取りが書き込みを待たないようにする）
+            cursor.execute("PRAGMA journal_mode=WAL")
+            
             # 同期セッションテーブル
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sync_sessions (
@@ -130,6 +130,26 @@ class SyncDatabase:
                 )
             """)
             
+            # 旧形式（パス・サイズ・更新時刻のみ）のハッシュキャッシュは破棄して作り直す
+            cursor.execute("PRAGMA table_info(file_hash_cache)")
+            columns = {row[1] for row in cursor.fetchall()}
+            if columns and 'fingerprint' not in columns:
+                cursor.execute("DROP TABLE file_hash_cache")
+            
+            # ハッシュキャッシュテーブル
+            # 録音機は同じファイル名・固定の更新時刻を使い回すことがあるため、
+            # inode と先頭・末尾の部分ハッシュも一致した場合だけ再計算しない
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_hash_cache (
+                    file_path TEXT PRIMARY KEY,
+                    file_size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    inode INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    file_hash TEXT NOT NULL
+                )
+            """)
+            
             # 設定テーブル
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sync_settings (
@@ -152,6 +172,8 @@ class SyncDatabase:
             isolation_level='DEFERRED'
         )
         conn.row_factory = sqlite3.Row
+        # WALモードではNORMALでも破損しないため、コミットごとのfsyncを省略する
+        conn.execute("PRAGMA synchronous=NORMAL")
         try:
             yield conn
         finally:
@@ -272,6 +294,51 @@ class SyncDatabase:
             conn.commit()
             return cursor.lastrowid
     
+    def record_file_syncs(self, session_id: str, file_infos: List[Dict]):
+        """
+        複数のファイル同期をまとめて記録（1トランザクション）
+        
+        Args:
+            session_id: セッションID
+            file_infos: ファイル情報の辞書のリスト
+        """
+        if not file_infos:
+            return
+        
+        sync_time = datetime.now()
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO file_sync_history
+                (session_id, file_path, file_name, file_size, file_hash,
+                 gdrive_file_id, gdrive_folder_id, sync_status, sync_time,
+                 error_message, retry_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    session_id,
+                    file_info.get('file_path'),
+                    file_info.get('file_name'),
+                    file_info.get('file_size', 0),
+                    file_info.get('file_hash'),
+                    file_info.get('gdrive_file_id'),
+                    file_info.get('gdrive_folder_id'),
+                    file_info.get('sync_status', 'pending'),
+                    sync_time,
+                    file_info.get('error_message'),
+                    file_info.get('retry_count', 0)
+                )
+                for file_info in file_infos
+            ])
+            
+            # ファイル追跡テーブルも更新
+            for file_info in file_infos:
+                if file_info.get('sync_status') == 'success':
+                    self._update_file_tracking(cursor, file_info)
+            
+            conn.commit()
+    
     def _update_file_tracking(self, cursor, file_info: Dict):
         """ファイル追跡情報を更新"""
         cursor.execute("""
@@ -330,6 +397,36 @@ class SyncDatabase:
                 return dict(row)
             return None
     
+    def check_files_exist_bulk(self, pairs: List[Tuple[str, str]]) -> set:
+        """
+        複数ファイルの存在をまとめて確認
+        
+        Args:
+            pairs: (ハッシュ値, Google DriveフォルダID) のリスト
+        
+        Returns:
+            同期済みだった (ハッシュ値, Google DriveフォルダID) の集合
+        """
+        found = set()
+        pairs = list(dict.fromkeys(pairs))
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # SQLiteのパラメータ数上限を超えないよう分割して問い合わせ
+            for start in range(0, len(pairs), 400):
+                chunk = pairs[start:start + 400]
+                placeholders = ', '.join(['(?, ?)'] * len(chunk))
+                cursor.execute(f"""
+                    SELECT DISTINCT file_hash, gdrive_folder_id FROM file_sync_history
+                    WHERE sync_status = 'success'
+                    AND (file_hash, gdrive_folder_id) IN (VALUES {placeholders})
+                """, [value for pair in chunk for value in pair])
+                
+                found.update((row['file_hash'], row['gdrive_folder_id']) for row in cursor.fetchall())
+        
+        return found
+    
     def get_files_to_sync(self, usb_path: str, file_list: List[Dict]) -> List[Dict]:
         """
         同期が必要なファイルのリストを取得（差分同期）
@@ -373,6 +470,53 @@ class SyncDatabase:
         self.logger.info(f"Found {len(files_to_sync)} files to sync out of {len(file_list)}")
         return files_to_sync
     
+    def get_cached_hashes(self, file_stats: Dict[str, Tuple[int, float, int, str]]) -> Dict[str, str]:
+        """
+        キャッシュ済みのハッシュ値を取得
+        
+        Args:
+            file_stats: {ファイルパス: (サイズ, 更新時刻, inode, 部分ハッシュ)}
+        
+        Returns:
+            すべての値が一致したファイルの {ファイルパス: ハッシュ値}
+        """
+        cached = {}
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            for file_path, (file_size, mtime, inode, fingerprint) in file_stats.items():
+                cursor.execute("""
+                    SELECT file_hash FROM file_hash_cache
+                    WHERE file_path = ? AND file_size = ? AND mtime = ?
+                      AND inode = ? AND fingerprint = ?
+                """, (file_path, file_size, mtime, inode, fingerprint))
+                
+                row = cursor.fetchone()
+                if row:
+                    cached[file_path] = row['file_hash']
+        
+        return cached
+    
+    def save_cached_hashes(self, entries: List[Tuple[str, int, float, int, str, str]]):
+        """
+        ハッシュ値をキャッシュに保存
+        
+        Args:
+            entries: (ファイルパス, サイズ, 更新時刻, inode, 部分ハッシュ, ハッシュ値) のリスト
+        """
+        if not entries:
+            return
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT OR REPLACE INTO file_hash_cache
+                (file_path, file_size, mtime, inode, fingerprint, file_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, entries)
+            conn.commit()
+    
     def get_session_history(self, limit: int = 10) -> List[Dict]:
         """
         最近の同期セッション履歴を取得
@@ -10,12 +10,23 @@ import logging.handlers
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
-import json
+
+# 設定ファイルの共有キャッシュ（スクリプトとして直接実行された場合は src または src/utils がパスの先頭）
+try:
+    from src.utils.config_cache import load_config
+except ImportError:
+    try:
+        from utils.config_cache import load_config
+    except ImportError:
+        from config_cache import load_config
 
 
 class LogManager:
     """ログ管理クラス"""
     
+    # ファイルサイズ表示の単位
+    SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+    
     def __init__(self, config_path: str = "config/settings.json"):
         """
         初期化
@@ -36,13 +47,8 @@ class LogManager:
         self.setup_loggers()
     
     def _load_config(self, config_path: str) -> dict:
-        """設定ファイルを読み込む"""
-        config_file = Path(config_path)
-        if config_file.exists():
-            with open(config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            return {}
+        """設定ファイルを読み込む（解析結果は他モジュールと共有）"""
+        return load_config(config_path) or {}
     
     def setup_loggers(self):
         """ロガーをセットアップ"""
@@ -236,11 +242,9 @@ class LogManager:
         Returns:
             フォーマットされたサイズ文字列
         """
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.2f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.2f} TB"
+        # bit_length から単位を直接求める（1024 = 2**10 ごとに単位が上がる）
+        index = 0 if size_bytes < 1 else min(4, (int(size_bytes).bit_length() - 1) // 10)
+        return f"{size_bytes / (1 << (10 * index)):.2f} {LogManager.SIZE_UNITS[index]}"
 
 
 class SyncStats:
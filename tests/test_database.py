@@ -154,6 +154,41 @@ class TestSyncDatabase:
             assert row['file_hash'] == 'abc123def456'
             assert row['sync_status'] == 'success'
     
+    def test_record_file_syncs(self, db):
+        """複数ファイル同期の一括記録のテスト"""
+        session_id = db.create_session("/test/path")
+        
+        file_infos = [
+            {
+                'file_path': '/test/a.mp3',
+                'file_name': 'a.mp3',
+                'file_size': 1000,
+                'file_hash': 'hash_a',
+                'gdrive_file_id': 'gdrive_a',
+                'sync_status': 'success'
+            },
+            {
+                'file_path': '/test/b.mp3',
+                'file_name': 'b.mp3',
+                'file_size': 2000,
+                'file_hash': 'hash_b',
+                'sync_status': 'failed',
+                'error_message': 'Upload failed'
+            }
+        ]
+        db.record_file_syncs(session_id, file_infos)
+        
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            # 全件が履歴に記録されていることを確認
+            cursor.execute("SELECT COUNT(*) FROM file_sync_history WHERE session_id = ?", (session_id,))
+            assert cursor.fetchone()[0] == 2
+            
+            # 成功したファイルのみ追跡テーブルに登録されることを確認
+            cursor.execute("SELECT file_path FROM file_tracking")
+            assert [row['file_path'] for row in cursor.fetchall()] == ['/test/a.mp3']
+    
     def test_check_file_exists(self, db):
         """ファイル存在確認のテスト"""
         # セッションとファイル同期を記録
@@ -183,6 +218,36 @@ class TestSyncDatabase:
         result = db.check_file_exists('hash123', 'different_folder')
         assert result is None
     
+    def test_check_files_exist_bulk(self, db):
+        """複数ファイルの存在一括確認のテスト"""
+        session_id = db.create_session("/test/path")
+        db.record_file_sync(session_id, {
+            'file_path': '/test/a.mp3',
+            'file_name': 'a.mp3',
+            'file_size': 1000,
+            'file_hash': 'hash_a',
+            'gdrive_folder_id': 'folder_1',
+            'sync_status': 'success'
+        })
+        db.record_file_sync(session_id, {
+            'file_path': '/test/b.mp3',
+            'file_name': 'b.mp3',
+            'file_size': 2000,
+            'file_hash': 'hash_b',
+            'gdrive_folder_id': 'folder_1',
+            'sync_status': 'failed'
+        })
+        
+        found = db.check_files_exist_bulk([
+            ('hash_a', 'folder_1'),   # 同期済み
+            ('hash_a', 'folder_2'),   # 別フォルダ
+            ('hash_b', 'folder_1'),   # 失敗
+            ('hash_c', 'folder_1')    # 未登録
+        ])
+        
+        # 成功したファイルのみ返されることを確認
+        assert found == {('hash_a', 'folder_1')}
+    
     def test_get_files_to_sync(self, db):
         """同期対象ファイル取得のテスト"""
         # ファイル追跡情報を追加
@@ -231,6 +296,30 @@ class TestSyncDatabase:
         sync_paths = [f['path'] for f in files_to_sync]
         assert '/test/new.mp3' in sync_paths
     
+    def test_hash_cache(self, db):
+        """ハッシュキャッシュのテスト"""
+        # ハッシュをキャッシュに保存
+        db.save_cached_hashes([
+            ('/test/a.mp3', 1000, 1700000000.5, 11, 'fp_a', 'hash_a'),
+            ('/test/b.mp3', 2000, 1700000001.0, 12, 'fp_b', 'hash_b'),
+            ('/test/d.mp3', 4000, 1700000000.0, 14, 'fp_d', 'hash_d')
+        ])
+        
+        cached = db.get_cached_hashes({
+            '/test/a.mp3': (1000, 1700000000.5, 11, 'fp_a'),   # 変更なし
+            '/test/b.mp3': (2000, 1700000002.0, 12, 'fp_b'),   # 更新時刻が変わった
+            '/test/c.mp3': (3000, 1700000000.0, 13, 'fp_c'),   # 未登録
+            '/test/d.mp3': (4000, 1700000000.0, 14, 'fp_d2')   # 同名・同サイズ・同時刻の別の録音
+        })
+        
+        # すべての値が一致したファイルのみ返されることを確認
+        assert cached == {'/test/a.mp3': 'hash_a'}
+        
+        # 再保存で上書きされることを確認
+        db.save_cached_hashes([('/test/b.mp3', 2000, 1700000002.0, 12, 'fp_b', 'hash_b2')])
+        cached = db.get_cached_hashes({'/test/b.mp3': (2000, 1700000002.0, 12, 'fp_b')})
+        assert cached == {'/test/b.mp3': 'hash_b2'}
+    
     def test_get_sync_statistics(self, db):
         """統計情報取得のテスト"""
         # テストデータを作成
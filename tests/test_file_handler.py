@@ -22,9 +22,9 @@ class TestFileHandler:
     def test_initialization(self, file_handler, mock_config):
         """初期化のテスト"""
         assert file_handler.config == mock_config
-        assert file_handler.audio_extensions == mock_config['audio_extensions']
+        assert file_handler.audio_extensions == frozenset(mock_config['audio_extensions'])
         assert file_handler.max_file_size == mock_config['max_file_size_mb'] * 1024 * 1024
-        assert file_handler.exclude_folders == mock_config['exclude_folders']
+        assert file_handler.exclude_folders == frozenset(mock_config['exclude_folders'])
     
     def test_is_audio_file(self, file_handler):
         """音声ファイル判定のテスト"""
@@ -137,3 +137,111 @@ class TestFileHandler:
         
         # 一致することを確認
         assert calculated_hash == expected_hash
+    
+    def test_load_config_cached(self, mock_config, temp_dir):
+        """設定ファイル読み込みキャッシュのテスト"""
+        import json
+        import os
+        
+        config_path = Path(temp_dir) / "settings.json"
+        config_path.write_text(json.dumps(mock_config), encoding='utf-8')
+        
+        handler1 = FileHandler(str(config_path))
+        handler2 = FileHandler(str(config_path))
+        assert handler1.config == handler2.config == mock_config
+        
+        # インスタンスごとに独立した辞書であること
+        handler1.config["max_file_size_mb"] = 1
+        assert handler2.config["max_file_size_mb"] == mock_config["max_file_size_mb"]
+        
+        # 入れ子のリストも共有されないこと
+        handler1.config["exclude_folders"].append("Private")
+        assert handler2.config["exclude_folders"] == mock_config["exclude_folders"]
+        assert FileHandler(str(config_path)).config["exclude_folders"] == mock_config["exclude_folders"]
+        
+        # ファイルが更新されたら再読み込みされること
+        mock_config["usb_identifier"] = "UPDATED_USB"
+        config_path.write_text(json.dumps(mock_config), encoding='utf-8')
+        stat = config_path.stat()
+        os.utime(config_path, (stat.st_atime, stat.st_mtime + 10))
+        assert FileHandler(str(config_path)).config["usb_identifier"] == "UPDATED_USB"
+    
+    def test_calculate_file_hash_multi_chunk(self, temp_dir):
+        """チャンク境界をまたぐファイルのハッシュ計算テスト"""
+        from src.file_handler import HASH_CHUNK_SIZE
+        
+        handler = FileHandler(str(Path(temp_dir) / "missing.json"))
+        test_file = Path(temp_dir) / "large.wav"
+        content = b"0123456789abcdef" * (HASH_CHUNK_SIZE // 8 + 3)
+        test_file.write_bytes(content)
+        
+        assert handler.calculate_file_hash(str(test_file)) == hashlib.md5(content).hexdigest()
+        assert handler.calculate_file_hash(str(test_file), "sha256") == hashlib.sha256(content).hexdigest()
+        
+        with pytest.raises(ValueError):
+            handler.calculate_file_hash(str(test_file), "crc32")
+    
+    def test_filter_new_files_parallel_hashing(self, temp_dir):
+        """並列ハッシュ計算による新規ファイル抽出のテスト"""
+        from src.file_handler import INLINE_HASH_MAX_BYTES
+        
+        handler = FileHandler(str(Path(temp_dir) / "missing.json"))
+        files = []
+        for i, size in enumerate([10, INLINE_HASH_MAX_BYTES, INLINE_HASH_MAX_BYTES * 2]):
+            path = Path(temp_dir) / f"file{i}.mp3"
+            path.write_bytes(bytes([i]) * size)
+            files.append({"name": path.name, "path": str(path), "size": size, "hash": None})
+        files.append({"name": "missing.mp3", "path": str(Path(temp_dir) / "missing.mp3"),
+                      "size": INLINE_HASH_MAX_BYTES, "hash": None})
+        
+        existing = [hashlib.md5(bytes([1]) * INLINE_HASH_MAX_BYTES).hexdigest()]
+        new_files = handler.filter_new_files(files, existing)
+        
+        # 入力順を保ち、既存ファイルと読み込めないファイルは除外される
+        assert [f["name"] for f in new_files] == ["file0.mp3", "file2.mp3"]
+        assert all(f["hash"] for f in files[:3])
+    
+    def test_calculate_file_hash_mmap(self, temp_dir):
+        """mmapによるハッシュ計算が通常の読み込みと一致することのテスト"""
+        from src.file_handler import MMAP_HASH_MIN_BYTES
+        
+        handler = FileHandler(str(Path(temp_dir) / "missing.json"))
+        test_file = Path(temp_dir) / "long.flac"
+        content = bytes(range(256)) * (MMAP_HASH_MIN_BYTES // 256 + 1)
+        test_file.write_bytes(content)
+        
+        handler.hash_use_mmap = True
+        mmap_hash = handler.calculate_file_hash(str(test_file))
+        handler.hash_use_mmap = False
+        read_hash = handler.calculate_file_hash(str(test_file))
+        
+        assert mmap_hash == read_hash == hashlib.md5(content).hexdigest()
+    
+    def test_filter_new_files_with_fingerprints(self, temp_dir):
+        """サイズ・部分ハッシュによる事前フィルタのテスト"""
+        from src.file_handler import FINGERPRINT_BYTES
+        
+        handler = FileHandler(str(Path(temp_dir) / "missing.json"))
+        size = FINGERPRINT_BYTES * 3
+        
+        existing = Path(temp_dir) / "existing.mp3"
+        existing.write_bytes(b"a" * size)
+        same_size = Path(temp_dir) / "same_size.mp3"
+        same_size.write_bytes(b"b" * size)
+        other_size = Path(temp_dir) / "other_size.mp3"
+        other_size.write_bytes(b"a" * (size + 1))
+        
+        files = [
+            {"name": p.name, "path": str(p), "size": p.stat().st_size, "hash": None}
+            for p in (existing, same_size, other_size)
+        ]
+        existing_hash = hashlib.md5(existing.read_bytes()).hexdigest()
+        fingerprints = {size: {handler.calculate_fingerprint(str(existing), size)}}
+        
+        new_files = handler.filter_new_files(files, [existing_hash], fingerprints)
+        
+        assert [f["name"] for f in new_files] == ["same_size.mp3", "other_size.mp3"]
+        # 一致し得るファイルだけ全体ハッシュが計算される
+        assert files[0]["hash"] == existing_hash
+        assert files[1]["hash"] is None
+        assert files[2]["hash"] is None
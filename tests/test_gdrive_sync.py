@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Google Drive同期モジュールのユニットテスト
+"""
+
+import json
+import hashlib
+import pytest
+import threading
+import httplib2
+from unittest.mock import Mock, patch
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, HttpMockSequence
+from pathlib import Path
+
+from src.gdrive_sync import GoogleDriveSync, HashingMediaFileUpload, UploadIntegrityError
+
+
+def make_http_error(status, headers=None, content=b''):
+    """テスト用の HttpError を作成"""
+    resp = httplib2.Response({'status': status, **(headers or {})})
+    return HttpError(resp, content)
+
+
+class FakeBatch:
+    """登録順にコールバックへ応答を返すバッチリクエスト"""
+    
+    def __init__(self, callback, responses):
+        self.callback = callback
+        self.responses = responses
+        self.requests = []
+    
+    def add(self, request, request_id):
+        self.requests.append((request, request_id))
+    
+    def execute(self):
+        for request, request_id in self.requests:
+            self.callback(request_id, self.responses(request), None)
+
+
+class TestGoogleDriveSync:
+    """GoogleDriveSyncクラスのテスト"""
+    
+    @pytest.fixture
+    def gdrive(self, mock_config, mock_logger):
+        """認証を行わない GoogleDriveSync インスタンスを作成"""
+        with patch.object(GoogleDriveSync, '_authenticate'):
+            gdrive = GoogleDriveSync(mock_config, mock_logger, database=Mock())
+        gdrive.credentials = Mock(valid=True)
+        gdrive._thread_local.service = Mock()
+        return gdrive
+    
+    def test_chunk_size_alignment(self, mock_config, mock_logger):
+        """チャンクサイズが 256 KiB の倍数に切り上げられることのテスト"""
+        for size_mb, expected in [(10, 10 * 1024 * 1024), (0.3, 512 * 1024), (0, 256 * 1024)]:
+            config = dict(mock_config, upload_chunk_size_mb=size_mb)
+            with patch.object(GoogleDriveSync, '_authenticate'):
+                gdrive = GoogleDriveSync(config, mock_logger, database=Mock())
+            assert gdrive.chunk_size == expected
+            assert gdrive.chunk_size % GoogleDriveSync.CHUNK_ALIGNMENT == 0
+    
+    def test_resolve_path_ids_partially_existing(self, gdrive):
+        """バッチ検索で見つからなかった既存の階層を作成しないことのテスト"""
+        # B は存在するがバッチ検索の結果には含まれなかった
+        gdrive._batch_find_folders = Mock(return_value={'A': [{'id': 'a', 'parents': ['root']}]})
+        gdrive._find_folder = Mock(side_effect=lambda name, parent: {('B', 'a'): 'b'}.get((name, parent)))
+        gdrive._create_new_folder = Mock(return_value='c')
+        
+        assert gdrive._resolve_path_ids(['A', 'B', 'C'], 'root') == 'c'
+        gdrive._create_new_folder.assert_called_once_with('C', 'b')
+    
+    def test_resolve_path_ids_skips_lookup_below_created(self, gdrive):
+        """作成したフォルダより下の階層は検索しないことのテスト"""
+        gdrive._batch_find_folders = Mock(return_value={'A': [{'id': 'a', 'parents': ['root']}]})
+        gdrive._find_folder = Mock(return_value=None)
+        gdrive._create_new_folder = Mock(side_effect=['x', 'y'])
+        
+        assert gdrive._resolve_path_ids(['A', 'X', 'Y'], 'root') == 'y'
+        gdrive._find_folder.assert_called_once_with('X', 'a')
+        assert gdrive._create_new_folder.call_args_list[1].args == ('Y', 'x')
+    
+    def test_batch_find_folders_pagination(self, gdrive):
+        """フォルダ検索が全ページを取得することのテスト"""
+        pages = {
+            None: {'files': [{'id': 'a1', 'parents': ['p1']}], 'nextPageToken': 'page2'},
+            'page2': {'files': [{'id': 'a2', 'parents': ['p2']}]},
+        }
+        service = gdrive._thread_local.service
+        service.files.return_value.list.side_effect = lambda **kwargs: kwargs
+        service.new_batch_http_request.side_effect = (
+            lambda callback: FakeBatch(callback, lambda request: pages[request['pageToken']])
+        )
+        
+        candidates = gdrive._batch_find_folders(['A'])
+        
+        assert [f['id'] for f in candidates['A']] == ['a1', 'a2']
+    
+    def test_get_file_hashes_detects_reused_name(self, gdrive, temp_dir):
+        """同名・同サイズ・同じ更新時刻の別の録音をキャッシュで見逃さないことのテスト"""
+        import os
+        from src.utils.database import SyncDatabase
+        
+        gdrive.database = SyncDatabase(db_path=os.path.join(temp_dir, "sync.db"))
+        file_path = os.path.join(temp_dir, "REC001.WAV")
+        
+        with open(file_path, 'wb') as f:
+            f.write(b"a" * 300000)
+        os.utime(file_path, (1700000000, 1700000000))
+        assert gdrive.get_file_hashes([file_path]) == {file_path: hashlib.md5(b"a" * 300000).hexdigest()}
+        
+        # 時計のない録音機が同じ名前・サイズ・更新時刻で新しい録音を書き込んだ場合
+        with open(file_path, 'r+b') as f:
+            f.write(b"b" * 300000)
+        os.utime(file_path, (1700000000, 1700000000))
+        assert gdrive.get_file_hashes([file_path]) == {file_path: hashlib.md5(b"b" * 300000).hexdigest()}
+        
+        # 変更がなければキャッシュを使い、全体を再計算しない
+        gdrive._calculate_file_hash = Mock(side_effect=AssertionError("rehashed"))
+        assert gdrive.get_file_hashes([file_path]) == {file_path: hashlib.md5(b"b" * 300000).hexdigest()}
+    
+    def test_dir_index_does_not_block_other_folders(self, gdrive):
+        """一覧の取得中も取得済みのフォルダの索引を参照できることのテスト"""
+        listing_started = threading.Event()
+        release_listing = threading.Event()
+        
+        def slow_listing():
+            listing_started.set()
+            release_listing.wait(5)
+            return {'files': [{'name': 'a.mp3', 'md5Checksum': 'h1'}]}
+        
+        service = gdrive._thread_local.service
+        service.files.return_value.list.return_value.execute.side_effect = slow_listing
+        gdrive._build_service = Mock(return_value=service)  # ワーカースレッドでも同じモックを使う
+        gdrive._dir_index = {'indexed': {'b.mp3': ['h2']}}
+        
+        results = {}
+        worker = threading.Thread(target=lambda: results.update(slow=gdrive._get_dir_index('slow')))
+        worker.start()
+        try:
+            assert listing_started.wait(5)
+            checker = threading.Thread(
+                target=lambda: results.update(indexed=gdrive._get_dir_index('indexed'))
+            )
+            checker.start()
+            checker.join(1)
+            # 一覧の取得が終わる前に参照できている
+            assert results.get('indexed') == {'b.mp3': ['h2']}
+        finally:
+            release_listing.set()
+            worker.join(5)
+        
+        assert results['slow'] == {'a.mp3': ['h1']}
+    
+    def test_is_retryable_error(self, gdrive):
+        """再試行するエラーの判定のテスト"""
+        # 通信エラーと送信内容の不一致は再試行する
+        assert gdrive._is_retryable_error(ConnectionResetError()) == True
+        assert gdrive._is_retryable_error(TimeoutError()) == True
+        assert gdrive._is_retryable_error(httplib2.ServerNotFoundError()) == True
+        assert gdrive._is_retryable_error(UploadIntegrityError()) == True
+        
+        # ローカルファイルのエラーは再試行しない
+        assert gdrive._is_retryable_error(FileNotFoundError()) == False
+        assert gdrive._is_retryable_error(PermissionError()) == False
+        
+        # HTTPステータスによる判定
+        assert gdrive._is_retryable_error(make_http_error(429)) == True
+        assert gdrive._is_retryable_error(make_http_error(503)) == True
+        assert gdrive._is_retryable_error(make_http_error(404)) == True
+        assert gdrive._is_retryable_error(make_http_error(400)) == False
+    
+    def test_is_retryable_error_rate_limit(self, gdrive):
+        """403 はレート制限の場合のみ再試行することのテスト"""
+        rate_limited = json.dumps({
+            'error': {'message': 'Rate limit', 'errors': [{'reason': 'userRateLimitExceeded'}]}
+        }).encode()
+        forbidden = json.dumps({
+            'error': {'message': 'Forbidden', 'errors': [{'reason': 'insufficientPermissions'}]}
+        }).encode()
+        assert gdrive._is_retryable_error(make_http_error(403, content=rate_limited)) == True
+        assert gdrive._is_retryable_error(make_http_error(403, content=forbidden)) == False
+    
+    def test_retry_delay(self, gdrive):
+        """再試行までの待機時間のテスト"""
+        # Retry-After ヘッダーを優先（上限あり）
+        assert gdrive._retry_delay(make_http_error(429, {'retry-after': '5'}), 1) == 5
+        assert gdrive._retry_delay(make_http_error(429, {'retry-after': '600'}), 1) == gdrive.MAX_RETRY_DELAY
+        
+        # 指数バックオフ + 1秒未満のジッター
+        gdrive.retry_delay = 1
+        for attempt, base in [(1, 1), (2, 2), (3, 4)]:
+            delay = gdrive._retry_delay(ConnectionResetError(), attempt)
+            assert base <= delay < base + 1
+        assert gdrive._retry_delay(ConnectionResetError(), 10) == gdrive.MAX_RETRY_DELAY
+    
+    def test_relative_folders(self):
+        """Drive上に再現するフォルダ名の取得のテスト"""
+        assert GoogleDriveSync._relative_folders(Path('/Volumes/USB/rec/day1')) == ('USB', 'rec', 'day1')
+        assert GoogleDriveSync._relative_folders(Path('/media/user/USB')) == ('media', 'user', 'USB')
+        assert GoogleDriveSync._relative_folders(Path('/Volumes/A/Volumes/B')) == ('B',)
+
+
+class TestHashingMediaFileUpload:
+    """HashingMediaFileUploadクラスのテスト"""
+    
+    def test_resumable_upload_hash(self, temp_dir):
+        """再開可能アップロードで送信内容のMD5が計算されることのテスト"""
+        content = bytes(range(256)) * 2400  # 約600 KiB（3チャンク）
+        file_path = f"{temp_dir}/audio.mp3"
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        
+        media = HashingMediaFileUpload(file_path, mimetype='audio/mpeg',
+                                       resumable=True, chunksize=256 * 1024)
+        http = HttpMockSequence([
+            ({'status': '200', 'location': 'https://upload.example/session'}, b''),
+            ({'status': '308', 'range': 'bytes=0-262143'}, b''),
+            ({'status': '308', 'range': 'bytes=0-524287'}, b''),
+            ({'status': '200'}, b'{"id": "file_id"}'),
+        ])
+        request = HttpRequest(http, lambda resp, body: json.loads(body),
+                              'https://upload.example/files?uploadType=resumable',
+                              method='POST', body='{}',
+                              headers={'content-type': 'application/json'},
+                              resumable=media)
+        
+        response = None
+        while response is None:
+            _, response = request.next_chunk()
+        
+        assert response == {'id': 'file_id'}
+        assert media.md5_hexdigest() == hashlib.md5(content).hexdigest()
+    
+    def test_partial_upload_has_no_hash(self, temp_dir):
+        """全体を送信していない場合はMD5を返さないことのテスト"""
+        file_path = f"{temp_dir}/audio.mp3"
+        with open(file_path, 'wb') as f:
+            f.write(b"x" * 1000)
+        
+        media = HashingMediaFileUpload(file_path, mimetype='audio/mpeg', resumable=False)
+        media.getbytes(0, 500)
+        assert media.md5_hexdigest() is None
+        
+        media.getbytes(0, 1000)
+        assert media.md5_hexdigest() == hashlib.md5(b"x" * 1000).hexdigest()
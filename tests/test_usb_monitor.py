@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+USB監視モジュールのユニットテスト
+"""
+
+import pytest
+from pathlib import Path
+
+from src.usb_monitor import USBMonitor
+
+
+class TestUSBMonitor:
+    """USBMonitorクラスのテスト"""
+    
+    @pytest.fixture
+    def usb_monitor(self, temp_dir):
+        """USBMonitorインスタンスを作成（設定ファイルなし）"""
+        return USBMonitor(str(Path(temp_dir) / "settings.json"))
+    
+    def test_read_mountinfo(self, usb_monitor, temp_dir):
+        """mountinfo からブロックデバイスのボリュームを取得するテスト"""
+        mountinfo = Path(temp_dir) / "mountinfo"
+        mountinfo.write_text("\n".join([
+            "22 1 0:21 / /proc rw,nosuid - proc proc rw",
+            "25 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw",
+            "36 25 8:17 / /media/user/My\\040USB rw,nosuid shared:2 - vfat /dev/sdb1 rw",
+            "40 25 0:35 / /run/user/1000 rw - tmpfs tmpfs rw",
+        ]) + "\n")
+        usb_monitor.MOUNTINFO_FILE = str(mountinfo)
+        
+        volumes = usb_monitor._read_mountinfo()
+        
+        # 仮想ファイルシステムとルートは含まれず、8進エスケープは復元される
+        assert volumes == [{
+            'name': 'My USB',
+            'path': '/media/user/My USB',
+            'device': '/dev/sdb1',
+            'size': 0,
+            'type': 'vfat'
+        }]
+    
+    def test_read_volume_id(self, usb_monitor, temp_dir):
+        """.volumeID の読み込みのテスト"""
+        (Path(temp_dir) / ".volumeID").write_text("TEST_USB\n")
+        
+        assert usb_monitor._read_volume_id(temp_dir) == "TEST_USB"
+        assert usb_monitor._read_volume_id(str(Path(temp_dir) / "missing")) is None
+        
+        # 長い識別子も切り詰めずに読み込む
+        long_id = "ID_" + "x" * 200
+        (Path(temp_dir) / ".volumeID").write_text(long_id)
+        assert usb_monitor._read_volume_id(temp_dir) == long_id
+        
+        # 上限を超えるファイルは識別子として扱わない
+        (Path(temp_dir) / ".volumeID").write_text("x" * (USBMonitor.VOLUME_ID_MAX_SIZE + 1))
+        assert usb_monitor._read_volume_id(temp_dir) is None
+